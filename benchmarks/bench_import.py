@@ -0,0 +1,98 @@
+"""
+Import-time benchmark for the MLBB Hero Suggestor.
+
+Starts fresh interpreters that import the suggestor's inference entry point
+(src/HeroSuggestor/main.py) and reports the median cold-start time, the
+slowest imported modules (from python -X importtime) and whether any of
+the training stack (pandas, scikit-learn, joblib) was pulled in.
+
+Exits with status 1 if the median exceeds --max_ms or a training-only
+module is imported, so it can run as a cold-start regression check:
+
+    python benchmarks/bench_import.py --runs 10 --max_ms 400
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+SUGGESTOR_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'HeroSuggestor')
+TRAINING_ONLY_MODULES = ('pandas', 'sklearn', 'joblib')
+
+PROBE = (
+    'import sys, json, main; '
+    f'print(json.dumps([m for m in {TRAINING_ONLY_MODULES!r} if m in sys.modules]))'
+)
+
+
+def time_import(runs):
+    """Wall time (ms) of `import main` in fresh interpreters, one per run."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', 'import main'], cwd=SUGGESTOR_DIR, check=True)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def slowest_imports(top):
+    """Top modules by cumulative import time (us), parsed from -X importtime."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import main'],
+                            cwd=SUGGESTOR_DIR, check=True, capture_output=True, text=True)
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        # "import time: <self us> | <cumulative us> | <indented module name>"
+        _, cumulative_us, name = line.split('|')
+        modules.append((int(cumulative_us), name.strip()))
+    modules.sort(reverse=True)
+    return [{'module': name, 'cumulative_us': us} for us, name in modules[:top]]
+
+
+def training_modules_loaded():
+    result = subprocess.run([sys.executable, '-c', PROBE], cwd=SUGGESTOR_DIR,
+                            check=True, capture_output=True, text=True)
+    return json.loads(result.stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cold-start import benchmark for the hero suggestor')
+    parser.add_argument('--runs', type=int, default=10, help='Fresh interpreters to time (default: 10)')
+    parser.add_argument('--max_ms', type=float, default=0, help='Fail if the median import time exceeds this (0 = no limit)')
+    parser.add_argument('--top', type=int, default=10, help='Slowest modules to report (default: 10)')
+    parser.add_argument('--json', type=str, default='', help='Also write the report to this JSON file')
+    args = parser.parse_args()
+
+    timings = time_import(args.runs)
+    report = {
+        'runs': args.runs,
+        'median_ms': round(statistics.median(timings), 2),
+        'min_ms': round(min(timings), 2),
+        'max_ms': round(max(timings), 2),
+        'training_modules_loaded': training_modules_loaded(),
+        'slowest_imports': slowest_imports(args.top),
+    }
+    print(f"import main: median {report['median_ms']} ms (min {report['min_ms']}, max {report['max_ms']}) "
+          f"over {args.runs} runs")
+    for entry in report['slowest_imports']:
+        print(f"  {entry['cumulative_us'] / 1000:8.1f} ms  {entry['module']}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    failed = False
+    if report['training_modules_loaded']:
+        print(f"FAIL: training-only modules imported: {report['training_modules_loaded']}")
+        failed = True
+    if args.max_ms and report['median_ms'] > args.max_ms:
+        print(f"FAIL: median import time {report['median_ms']} ms exceeds {args.max_ms} ms")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+"""
+Latency and memory benchmark for the MLBB Hero Suggestor.
+
+Measures, per scoring engine:
+  - cold start: wall time of a full CLI suggestion in a fresh interpreter
+  - model load: time to load the engine's model file (load_engine)
+  - parsing: parse_hero_arg time per draft field
+  - suggest_heroes latency (mean, p50/p95/p99) over a fixed corpus of
+    generated draft states
+  - peak RSS of the process that loaded the model and ran the corpus
+
+The corpus is generated from --seed, so runs are comparable. Each engine is
+measured in its own child process so peak RSS is per engine. Results can be
+written as JSON and compared against a stored baseline; the run fails if a
+timing or memory figure got worse by more than --tolerance:
+
+    python benchmarks/bench_suggest.py --json baseline.json
+    python benchmarks/bench_suggest.py --baseline baseline.json --tolerance 0.25
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+SUGGESTOR_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'HeroSuggestor')
+ENGINES = ('forest', 'matrix')
+# Report keys compared against the baseline; lower is better for all of them
+COMPARED_METRICS = ('cold_start_ms', 'load_ms', 'parse_us', 'mean_ms', 'p50_ms', 'p95_ms', 'p99_ms', 'peak_rss_mb')
+COLD_START_ARGS = ['--team_pick', 'miya,yve', '--team_ban', 'suyou', '--enemy_pick', 'kalea,chip', '--suggest', '5']
+
+
+def generate_corpus(n, seed, hero_ids):
+    """
+    n random but valid draft states as dicts of comma-separated strings,
+    mixing hero names and IDs like real CLI input.
+    """
+    from main import HERO_ID_TO_NAME, MAX_BAN, MAX_ENEMY, MAX_TEAM
+    rng = np.random.default_rng(seed)
+    corpus = []
+    for _ in range(n):
+        sizes = [rng.integers(1, MAX_TEAM + 1), rng.integers(0, MAX_BAN + 1),
+                 rng.integers(1, MAX_ENEMY + 1), rng.integers(0, MAX_BAN + 1)]
+        heroes = rng.choice(hero_ids, size=sum(sizes), replace=False)
+        draft, start = {}, 0
+        for field, size in zip(('team_pick', 'team_ban', 'enemy_pick', 'enemy_ban'), sizes):
+            names = [HERO_ID_TO_NAME[h] if rng.random() < 0.7 else str(h) for h in heroes[start:start + size]]
+            draft[field] = ','.join(names)
+            start += size
+        corpus.append(draft)
+    return corpus
+
+
+def percentile(values, q):
+    return round(float(np.percentile(values, q)), 4)
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 2)
+
+
+def measure_engine(engine, n_drafts, seed, load_runs):
+    """Runs in the child process: load, parse and suggest timings for one engine."""
+    from main import HERO_ID_TO_NAME, load_engine, parse_hero_arg, suggest_heroes
+
+    load_times = []
+    for _ in range(load_runs):
+        start = time.perf_counter()
+        model_data = load_engine(engine)
+        load_times.append((time.perf_counter() - start) * 1000)
+
+    corpus = generate_corpus(n_drafts, seed, np.array(sorted(HERO_ID_TO_NAME)))
+    start = time.perf_counter()
+    drafts = [[parse_hero_arg(draft[field]) for field in ('team_pick', 'team_ban', 'enemy_pick', 'enemy_ban')]
+              for draft in corpus]
+    parse_us = (time.perf_counter() - start) * 1e6 / (len(corpus) * 4)
+
+    latencies = []
+    for team_pick, team_ban, enemy_pick, enemy_ban in drafts:
+        start = time.perf_counter()
+        suggest_heroes(team_pick, team_ban, enemy_pick, enemy_ban, 5, model_data=model_data, engine=engine)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return {
+        'load_ms': round(statistics.median(load_times), 4),
+        'parse_us': round(parse_us, 4),
+        'drafts': len(latencies),
+        'mean_ms': round(statistics.fmean(latencies), 4),
+        'p50_ms': percentile(latencies, 50),
+        'p95_ms': percentile(latencies, 95),
+        'p99_ms': percentile(latencies, 99),
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def cold_start(engine, runs):
+    """Median wall time (ms) of one CLI suggestion in fresh interpreters."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, 'main.py', '--engine', engine, *COLD_START_ARGS], cwd=SUGGESTOR_DIR,
+                       check=True, stdout=subprocess.DEVNULL)
+        timings.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(timings), 4)
+
+
+def run_child(engine, args):
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--child', engine, '--drafts', str(args.drafts),
+         '--seed', str(args.seed), '--load_runs', str(args.load_runs)],
+        check=True, capture_output=True, text=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def compare(report, baseline, tolerance):
+    """Returns one message per metric that regressed beyond tolerance."""
+    regressions = []
+    for engine, metrics in report['engines'].items():
+        base_metrics = baseline.get('engines', {}).get(engine, {})
+        for key in COMPARED_METRICS:
+            current, base = metrics.get(key), base_metrics.get(key)
+            if current is None or not base:
+                continue
+            if current > base * (1 + tolerance):
+                regressions.append(f'{engine} {key}: {current} vs baseline {base} (+{(current / base - 1) * 100:.0f}%)')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Latency and memory benchmark for the hero suggestor')
+    parser.add_argument('--engine', choices=ENGINES + ('all',), default='all', help='Engine to benchmark (default: all)')
+    parser.add_argument('--drafts', type=int, default=500, help='Generated draft states to score (default: 500)')
+    parser.add_argument('--seed', type=int, default=7, help='Seed of the draft corpus (default: 7)')
+    parser.add_argument('--load_runs', type=int, default=5, help='Model loads to time (default: 5)')
+    parser.add_argument('--cold_runs', type=int, default=5, help='Fresh CLI runs to time (default: 5)')
+    parser.add_argument('--json', type=str, default='', help='Write the report to this JSON file')
+    parser.add_argument('--baseline', type=str, default='', help='Compare against this earlier JSON report')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed slowdown vs the baseline (default: 0.2 = 20%%)')
+    parser.add_argument('--child', choices=ENGINES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    sys.path.insert(0, SUGGESTOR_DIR)
+    if args.child:
+        os.chdir(SUGGESTOR_DIR)
+        print(json.dumps(measure_engine(args.child, args.drafts, args.seed, args.load_runs)))
+        return
+
+    engines = ENGINES if args.engine == 'all' else (args.engine,)
+    report = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': sys.version.split()[0],
+        'numpy': np.__version__,
+        'drafts': args.drafts,
+        'seed': args.seed,
+        'engines': {},
+    }
+    for engine in engines:
+        metrics = {'cold_start_ms': cold_start(engine, args.cold_runs), **run_child(engine, args)}
+        report['engines'][engine] = metrics
+        print(f"{engine}: cold start {metrics['cold_start_ms']:.1f} ms, load {metrics['load_ms']:.2f} ms, "
+              f"parse {metrics['parse_us']:.2f} us/field, suggest p50 {metrics['p50_ms']:.3f} / "
+              f"p95 {metrics['p95_ms']:.3f} / p99 {metrics['p99_ms']:.3f} ms, peak RSS {metrics['peak_rss_mb']} MB")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for message in regressions:
+            print(f'FAIL: {message}')
+        if regressions:
+            sys.exit(1)
+        print(f'No regressions beyond {args.tolerance:.0%} of {args.baseline}')
+
+
+if __name__ == '__main__':
+    main()
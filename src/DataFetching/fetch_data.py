@@ -14,17 +14,27 @@ import os
 import argparse
 import sys
 import base64
+import hashlib
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from pathlib import Path
 from typing import Dict, Any, Optional, Union, List
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from enum import Enum
 import logging
+from requests.adapters import HTTPAdapter
 from requests.exceptions import RequestException, Timeout, ConnectionError
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 from dotenv import load_dotenv
 
+from snapshot_store import STORE_FILE, open_store, snapshot_key, write_store
+
 
 class MatchType(Enum):
     """Enumeration for different match types in MLBB."""
@@ -68,6 +78,131 @@ class APIResponse:
     status_code: int
 
 
+class RateLimiter:
+    """
+    Thread-safe limiter that spaces requests evenly at a global rate.
+
+    Every caller reserves the next free slot under a lock and then sleeps
+    outside it until the slot comes up, so any number of worker threads
+    together stay at or below the configured rate.
+
+    Attributes:
+        rate (float): Maximum requests per second (0 or less disables limiting)
+    """
+
+    def __init__(self, rate: float) -> None:
+        """
+        Initialize the rate limiter.
+
+        Args:
+            rate (float): Maximum requests per second. 0 or less means unlimited.
+        """
+        self.rate = rate
+        self._interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until the caller may send its next request."""
+        if self._interval <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self._interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class CircuitBreaker:
+    """
+    Pauses all requests while the upstream API is overloaded.
+
+    Overload signals (429, 5xx and network errors) are counted across all
+    worker threads. After `threshold` of them in a row the breaker opens,
+    and every worker waits in `wait()` until the cooldown (or a longer
+    Retry-After) has passed. Any successful response closes it again.
+
+    Attributes:
+        threshold (int): Consecutive overload failures that open the breaker
+        cooldown (float): Seconds the breaker stays open
+        trips (int): Number of times the breaker has opened
+    """
+
+    def __init__(self, threshold: int, cooldown: float, logger: logging.Logger) -> None:
+        """
+        Initialize the circuit breaker.
+
+        Args:
+            threshold (int): Consecutive overload failures that open the breaker.
+            cooldown (float): Seconds to pause all requests once it opens.
+            logger (logging.Logger): Logger for open/close messages.
+        """
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.trips = 0
+        self.logger = logger
+        self._failures = 0
+        self._open_until = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        """Block while the breaker is open."""
+        while True:
+            with self._lock:
+                remaining = self._open_until - time.monotonic()
+            if remaining <= 0:
+                return
+            time.sleep(remaining)
+
+    def record_success(self) -> None:
+        """Reset the failure count after a successful response."""
+        with self._lock:
+            self._failures = 0
+
+    def record_failure(self, retry_after: Optional[float] = None) -> None:
+        """
+        Count one overload failure, opening the breaker at the threshold.
+
+        Args:
+            retry_after (Optional[float]): Seconds the server asked to wait, if any.
+        """
+        with self._lock:
+            self._failures += 1
+            if self._failures < self.threshold or time.monotonic() < self._open_until:
+                return
+            pause = max(self.cooldown, retry_after or 0.0)
+            self._open_until = time.monotonic() + pause
+            self._failures = 0
+            self.trips += 1
+        self.logger.warning(f"Upstream overloaded, pausing all requests for {pause:.1f}s")
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header given in seconds or as an HTTP date.
+
+    Args:
+        value (Optional[str]): The header value
+
+    Returns:
+        Optional[float]: Seconds to wait, or None if absent or unparsable
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
 class MLBBDataFetcher:
     """
     A professional class for fetching MLBB hero data including counters and compatibility.
@@ -81,6 +216,14 @@ class MLBBDataFetcher:
         default_headers (Dict[str, str]): Default headers for API requests
         timeout (int): Request timeout in seconds
         max_retries (int): Maximum number of retry attempts
+        workers (int): Concurrent requests used by bulk fetches
+        rate_limiter (RateLimiter): Global request rate shared by all workers
+        session (requests.Session): Pooled keep-alive HTTP session shared by all workers
+        circuit_breaker (CircuitBreaker): Pauses the bulk run while the API is overloaded
+        incremental (bool): Skip rewriting snapshots whose content did not change
+        manifest (Dict[str, Any]): Last-seen update timestamp and hash per snapshot
+        changed_heroes (Dict[str, Dict[str, set]]): Heroes whose data changed, by rank and data type
+        snapshot_format (str): "store" (one compressed snapshot store per directory), "json" or "both"
     """
     
     # Class constants (encrypted URL and endpoint)
@@ -92,12 +235,30 @@ class MLBBDataFetcher:
     DEFAULT_PAGE_INDEX: int = 1
     REQUEST_TIMEOUT: int = 30
     MAX_RETRIES: int = 3
+    DEFAULT_WORKERS: int = 8
+    DEFAULT_RATE_LIMIT: float = 10.0
+    # Statuses worth retrying: rate limiting and server-side failures
+    RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+    BACKOFF_BASE: float = 1.0
+    BACKOFF_MAX: float = 30.0
+    BREAKER_THRESHOLD: int = 5
+    BREAKER_COOLDOWN: float = 30.0
+    MANIFEST_FILE: str = "fetch_manifest.json"
+    MANIFEST_VERSION: int = 1
+    CHANGES_FILE: str = "changed_heroes.json"
+    RANK_NAMES = {"101": "All", "5": "Epic", "6": "Legend", "7": "Mythic", "8": "Honor", "9": "Glory"}
+    SNAPSHOT_FORMATS = ("store", "json", "both")
+    DEFAULT_SNAPSHOT_FORMAT: str = "store"
     
     def __init__(
         self,
         timeout: int = REQUEST_TIMEOUT,
         max_retries: int = MAX_RETRIES,
-        data_directory: str = "data"
+        data_directory: str = "data",
+        workers: int = DEFAULT_WORKERS,
+        rate_limit: float = DEFAULT_RATE_LIMIT,
+        incremental: bool = False,
+        snapshot_format: str = DEFAULT_SNAPSHOT_FORMAT
     ) -> None:
         """
         Initialize the MLBB Data Fetcher.
@@ -106,7 +267,21 @@ class MLBBDataFetcher:
             timeout (int): Request timeout in seconds. Defaults to 30.
             max_retries (int): Maximum retry attempts. Defaults to 3.
             data_directory (str): Base directory for saving data files. Defaults to "data".
+            workers (int): Concurrent requests for bulk fetches. Defaults to 8.
+            rate_limit (float): Maximum requests per second across all workers,
+                0 for unlimited. Defaults to 10.
+            incremental (bool): Skip rewriting snapshots that did not change
+                since the last run. Defaults to False.
+            snapshot_format (str): "store" packs each directory's snapshots into one
+                compressed snapshot store (see snapshot_store.py), "json" writes one
+                JSON file per hero, "both" does both. Defaults to "store".
+            
+        Raises:
+            ValueError: If snapshot_format is not recognized
         """
+        if snapshot_format not in self.SNAPSHOT_FORMATS:
+            raise ValueError(f"snapshot_format must be one of {self.SNAPSHOT_FORMATS}")
+
         # Load environment variables
         load_dotenv()
         
@@ -117,6 +292,8 @@ class MLBBDataFetcher:
 
         self.timeout = timeout
         self.max_retries = max_retries
+        self.workers = max(1, workers)
+        self.rate_limiter = RateLimiter(rate_limit)
         self.data_directory = Path(data_directory)
         self.default_headers = {'Content-Type': 'application/json'}
         
@@ -131,6 +308,22 @@ class MLBBDataFetcher:
             self.logger.addHandler(handler)
             self.logger.setLevel(logging.INFO)
         
+        # One keep-alive connection pool for all requests, sized for the workers
+        self.session = requests.Session()
+        self._pool_size = 0
+        self._size_connection_pool(self.workers)
+        self.circuit_breaker = CircuitBreaker(self.BREAKER_THRESHOLD, self.BREAKER_COOLDOWN, self.logger)
+        
+        self.incremental = incremental
+        self.manifest = self._load_manifest()
+        self.changed_heroes: Dict[str, Dict[str, set]] = {}
+        self._manifest_lock = threading.Lock()
+        # Rank tiers written to their own rank_<tier> subdirectory
+        self.rank_directories: Dict[str, Path] = {}
+        self.snapshot_format = snapshot_format
+        # Snapshots waiting to be packed into each directory's store by flush_snapshots
+        self._pending_snapshots: Dict[Path, Dict[str, Dict[str, Any]]] = {}
+        
         # Create data directories if they don't exist
         self._ensure_data_directories()
     
@@ -199,6 +392,45 @@ class MLBBDataFetcher:
         encrypted_url = fernet.encrypt(url.encode())
         return base64.urlsafe_b64encode(encrypted_url).decode()
     
+    def _size_connection_pool(self, workers: int) -> None:
+        """
+        Make the session's connection pool hold at least one keep-alive
+        connection per worker. A smaller pool discards the connections of
+        the extra threads ("Connection pool is full"), so they handshake again.
+        
+        Args:
+            workers (int): Number of threads that will share the session
+        """
+        if workers <= self._pool_size:
+            return
+        previous = self.session.adapters.get("https://")
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        if previous is not None:
+            previous.close()
+        self._pool_size = workers
+    
+    def close(self) -> None:
+        """Write pending snapshots to their stores and close the pooled HTTP session."""
+        self.flush_snapshots()
+        self.session.close()
+    
+    def _backoff_delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        Delay before the next attempt: exponential backoff with full jitter,
+        or the server's Retry-After when it asks for longer.
+        
+        Args:
+            attempt (int): Zero-based number of the attempt that just failed
+            retry_after (Optional[float]): Seconds the server asked to wait, if any
+            
+        Returns:
+            float: Seconds to sleep before retrying
+        """
+        delay = random.uniform(0, min(self.BACKOFF_MAX, self.BACKOFF_BASE * 2 ** attempt))
+        return max(delay, retry_after or 0.0)
+    
     def _validate_hero_id(self, hero_id: int) -> bool:
         """
         Validate if the hero ID is within the acceptable range.
@@ -235,27 +467,186 @@ class MLBBDataFetcher:
             self.logger.addHandler(handler)
             self.logger.setLevel(logging.INFO)
     
-    def _ensure_data_directories(self) -> None:
+    def _ensure_data_directories(self, directory: Optional[Path] = None) -> None:
         """
         Create necessary data directories if they don't exist.
         
+        Args:
+            directory (Optional[Path]): Base directory. Defaults to the data directory.
+        
         Creates:
             - data/hero_counter/
             - data/hero_compatibility/
+        The JSON directories are not created when only the store is written.
         """
-        counter_dir = self.data_directory / "hero_counter"
-        compatibility_dir = self.data_directory / "hero_compatibility"
+        directory = directory or self.data_directory
+        if self.snapshot_format == "store":
+            directory.mkdir(parents=True, exist_ok=True)
+            self.logger.info(f"Data directory ensured: {directory}")
+            return
+        counter_dir = directory / "hero_counter"
+        compatibility_dir = directory / "hero_compatibility"
         
         counter_dir.mkdir(parents=True, exist_ok=True)
         compatibility_dir.mkdir(parents=True, exist_ok=True)
         
         self.logger.info(f"Data directories ensured: {counter_dir}, {compatibility_dir}")
     
+    def _rank_directory(self, rank: str) -> Path:
+        """Directory that snapshots of a rank tier are saved to."""
+        return self.rank_directories.get(rank, self.data_directory)
+    
+    def _load_manifest(self) -> Dict[str, Any]:
+        """
+        Load the snapshot manifest of the data directory.
+        
+        Returns:
+            Dict[str, Any]: The manifest, or an empty one if missing or outdated
+        """
+        path = self.data_directory / self.MANIFEST_FILE
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get("version") == self.MANIFEST_VERSION:
+                return manifest
+        except (OSError, ValueError):
+            pass
+        return {"version": self.MANIFEST_VERSION, "entries": {}}
+    
+    def _write_json_atomic(self, path: Path, data: Dict[str, Any]) -> None:
+        """Write JSON to a temporary file and move it into place."""
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    
+    def save_manifest(self) -> None:
+        """
+        Write the manifest to the data directory, and the heroes changed in
+        this run to the directory of each rank tier.
+        """
+        with self._manifest_lock:
+            self._write_json_atomic(self.data_directory / self.MANIFEST_FILE, self.manifest)
+            changes = {rank: {name: sorted(heroes) for name, heroes in kinds.items()}
+                       for rank, kinds in self.changed_heroes.items()}
+        finished_at = time.strftime('%Y-%m-%dT%H:%M:%S')
+        for rank, kinds in changes.items():
+            self._write_json_atomic(self._rank_directory(rank) / self.CHANGES_FILE, {
+                "finished_at": finished_at,
+                "rank": rank,
+                **kinds
+            })
+    
+    @staticmethod
+    def _snapshot_entry(data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Summarize a response for the manifest: the newest _updatedAt of its
+        records, their _ids and a hash of the whole response.
+        
+        Args:
+            data (Dict[str, Any]): The API response data
+            
+        Returns:
+            Dict[str, Any]: Manifest entry with updated_at, ids and hash
+        """
+        records = (data.get("data") or {}).get("records") or []
+        canonical = json.dumps(data, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+        return {
+            "updated_at": max((record.get("_updatedAt") or 0 for record in records), default=None),
+            "ids": [record.get("_id") for record in records],
+            "hash": hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+        }
+    
+    def _store_snapshot(
+        self,
+        data: Dict[str, Any],
+        hero_id: int,
+        data_type: str,
+        match_type: MatchType,
+        rank: str,
+        language: str
+    ) -> bool:
+        """
+        Save a response unless incremental mode finds it unchanged, and
+        record it in the manifest keyed by (hero, match_type, rank, lang).
+        
+        Args:
+            data (Dict[str, Any]): The API response data
+            hero_id (int): The hero ID
+            data_type (str): Either "counter" or "compatibility"
+            match_type (MatchType): Match type of the request
+            rank (str): Rank filter value of the request
+            language (str): Language code of the request
+            
+        Returns:
+            bool: True if the snapshot is on disk and up to date, False otherwise
+        """
+        key = f"{hero_id}|{match_type.value}|{rank}|{language}"
+        entry = self._snapshot_entry(data)
+        with self._manifest_lock:
+            previous = self.manifest["entries"].get(key)
+        changed = (previous is None or previous.get("hash") != entry["hash"]
+                   or previous.get("updated_at") != entry["updated_at"])
+        directory = self._rank_directory(rank)
+        file_name = "hero_counter" if data_type == "counter" else "hero_compatibility"
+        file_path = directory / file_name / f"{hero_id}.json"
+        # An existing store is kept up to date even when only JSON is written
+        use_store = self.snapshot_format != "json" or (directory / STORE_FILE).exists()
+        use_json = self.snapshot_format != "store"
+        
+        if self.incremental and not changed and (not use_json or file_path.exists()) \
+                and (not use_store or self._in_store(directory, snapshot_key(file_name, hero_id))):
+            self.logger.info(f"Hero {hero_id} {data_type} data unchanged, skipping write")
+            return True
+        if use_json and not self._save_to_file(data, hero_id, data_type, directory):
+            return False
+        with self._manifest_lock:
+            if use_store:
+                self._pending_snapshots.setdefault(directory, {})[snapshot_key(file_name, hero_id)] = data
+            self.manifest["entries"][key] = {**entry, "checked_at": int(time.time() * 1000)}
+            if changed:
+                kinds = self.changed_heroes.setdefault(rank, {"counters": set(), "compatibility": set()})
+                kinds["counters" if data_type == "counter" else "compatibility"].add(hero_id)
+        return True
+    
+    def _in_store(self, directory: Path, key: str) -> bool:
+        """Whether a snapshot is in a directory's store, on disk or waiting to be written."""
+        with self._manifest_lock:
+            if key in self._pending_snapshots.get(directory, {}):
+                return True
+        store = open_store(directory)
+        if store is None:
+            return False
+        with store:
+            return key in store
+    
+    def flush_snapshots(self) -> None:
+        """
+        Pack the snapshots fetched since the last flush into the store of
+        their directory. Snapshots already in a store are kept unless they
+        were fetched again.
+        """
+        with self._manifest_lock:
+            pending, self._pending_snapshots = self._pending_snapshots, {}
+        for directory, snapshots in pending.items():
+            path = directory / STORE_FILE
+            base = open_store(directory)
+            try:
+                count = write_store(path, snapshots, {"fetched": len(snapshots)}, base)
+            except Exception as e:
+                self.logger.error(f"Failed to write snapshot store {path}: {str(e)}")
+                continue
+            finally:
+                if base is not None:
+                    base.close()
+            self.logger.info(f"Snapshot store saved to: {path} ({len(snapshots)} updated, {count} total)")
+    
     def _save_to_file(
         self,
         data: Dict[str, Any],
         hero_id: int,
-        data_type: str
+        data_type: str,
+        directory: Optional[Path] = None
     ) -> bool:
         """
         Save fetched data to JSON file.
@@ -264,15 +655,17 @@ class MLBBDataFetcher:
             data (Dict[str, Any]): The data to save
             hero_id (int): The hero ID for filename
             data_type (str): Either "counter" or "compatibility"
+            directory (Optional[Path]): Base directory. Defaults to the data directory.
             
         Returns:
             bool: True if saved successfully, False otherwise
         """
+        directory = directory or self.data_directory
         try:
             if data_type == "counter":
-                file_path = self.data_directory / "hero_counter" / f"{hero_id}.json"
+                file_path = directory / "hero_counter" / f"{hero_id}.json"
             elif data_type == "compatibility":
-                file_path = self.data_directory / "hero_compatibility" / f"{hero_id}.json"
+                file_path = directory / "hero_compatibility" / f"{hero_id}.json"
             else:
                 self.logger.error(f"Invalid data_type: {data_type}")
                 return False
@@ -345,6 +738,10 @@ class MLBBDataFetcher:
         """
         Make HTTP request to MLBB API with retry logic.
         
+        Requests go through the pooled session. 429, 5xx and network errors
+        are retried with exponential backoff and jitter, honoring Retry-After,
+        and count towards the circuit breaker; other statuses fail at once.
+        
         Args:
             payload (APIPayload): The request payload
             headers (Dict[str, str]): Request headers
@@ -368,13 +765,17 @@ class MLBBDataFetcher:
             "pageIndex": payload.pageIndex
         }
         
-        last_exception = None
+        last_error = None
+        status_code = 0
         
         for attempt in range(self.max_retries):
+            retry_after = None
+            self.circuit_breaker.wait()
+            self.rate_limiter.acquire()
             try:
                 self.logger.info(f"Making API request (attempt {attempt + 1}/{self.max_retries})")
                 
-                response = requests.post(
+                response = self.session.post(
                     url,
                     json=payload_dict,
                     headers=headers,
@@ -382,52 +783,103 @@ class MLBBDataFetcher:
                 )
                 
                 if response.status_code == 200:
+                    self.circuit_breaker.record_success()
                     return APIResponse(
                         success=True,
                         data=response.json(),
                         error_message=None,
                         status_code=response.status_code
                     )
-                else:
-                    error_msg = f"API returned status {response.status_code}: {response.text}"
+                
+                error_msg = f"API returned status {response.status_code}: {response.text}"
+                status_code = response.status_code
+                if response.status_code not in self.RETRY_STATUSES:
                     self.logger.warning(error_msg)
-                    
                     return APIResponse(
                         success=False,
                         data=None,
                         error_message=error_msg,
                         status_code=response.status_code
                     )
+                last_error = error_msg
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                self.logger.warning(f"Retryable status on attempt {attempt + 1}: {error_msg}")
                     
             except (ConnectionError, Timeout) as e:
-                last_exception = e
+                last_error = str(e)
+                status_code = 0
                 self.logger.warning(f"Network error on attempt {attempt + 1}: {str(e)}")
-                if attempt < self.max_retries - 1:
-                    continue
                     
             except RequestException as e:
-                last_exception = e
+                last_error = str(e)
+                status_code = 0
                 self.logger.error(f"Request error: {str(e)}")
                 break
+            
+            self.circuit_breaker.record_failure(retry_after)
+            if attempt < self.max_retries - 1:
+                delay = self._backoff_delay(attempt, retry_after)
+                self.logger.info(f"Retrying in {delay:.2f}s")
+                time.sleep(delay)
         
         # If we get here, all retries failed
-        error_msg = f"All {self.max_retries} attempts failed. Last error: {str(last_exception)}"
+        error_msg = f"All {self.max_retries} attempts failed. Last error: {last_error}"
         self.logger.error(error_msg)
         
         return APIResponse(
             success=False,
             data=None,
             error_message=error_msg,
-            status_code=0
+            status_code=status_code
         )
     
+    def _request_all_pages(
+        self,
+        payload: APIPayload,
+        headers: Dict[str, str]
+    ) -> APIResponse:
+        """
+        Request every page from payload.pageIndex on, until the response's
+        `total` is covered, and merge the records into the first response.
+        
+        Args:
+            payload (APIPayload): The request payload of the first page
+            headers (Dict[str, str]): Request headers
+            
+        Returns:
+            APIResponse: The first page's response holding all records, or
+            the first failed page's response
+        """
+        response = self._make_request(payload, headers)
+        if not response.success or not response.data:
+            return response
+        
+        data = response.data.get("data") or {}
+        records = list(data.get("records") or [])
+        total = data.get("total") or 0
+        page_index = payload.pageIndex
+        while page_index * payload.pageSize < total:
+            page_index += 1
+            self.logger.info(f"Fetching page {page_index} ({len(records)}/{total} records so far)")
+            page = self._make_request(replace(payload, pageIndex=page_index), headers)
+            if not page.success or not page.data:
+                return page
+            page_records = (page.data.get("data") or {}).get("records") or []
+            if not page_records:
+                break
+            records.extend(page_records)
+        
+        response.data = {**response.data, "data": {**data, "records": records}}
+        return response
+    
     def get_hero_counters(
         self,
         main_hero_id: int,
         language: str = "en",
         page_size: int = DEFAULT_PAGE_SIZE,
         page_index: int = DEFAULT_PAGE_INDEX,
-        rank: str = "7"
+        rank: str = "7",
+        all_pages: bool = False
     ) -> APIResponse:
         """
         Fetch hero counter data for a specific hero.
@@ -441,6 +893,7 @@ class MLBBDataFetcher:
             page_size (int): Number of results per page. Defaults to 20
             page_index (int): Page index for pagination. Defaults to 1
             rank (str): Rank filter value ("101"=All, "5"=Epic, "6"=Legend, "7"=Mythic, "8"=Honor, "9"=Glory). Defaults to "7"
+            all_pages (bool): Also fetch the pages after page_index and merge their records. Defaults to False
             
         Returns:
             APIResponse: Response containing counter data or error information
@@ -481,11 +934,14 @@ class MLBBDataFetcher:
         
         headers = self._build_headers(language)
         
-        response = self._make_request(payload, headers)
+        if all_pages:
+            response = self._request_all_pages(payload, headers)
+        else:
+            response = self._make_request(payload, headers)
         
         # Save data to file if request was successful
         if response.success and response.data:
-            self._save_to_file(response.data, main_hero_id, "counter")
+            self._store_snapshot(response.data, main_hero_id, "counter", MatchType.COUNTER, rank, language)
         
         return response
     
@@ -495,7 +951,8 @@ class MLBBDataFetcher:
         language: str = "en",
         page_size: int = DEFAULT_PAGE_SIZE,
         page_index: int = DEFAULT_PAGE_INDEX,
-        rank: str = "7"
+        rank: str = "7",
+        all_pages: bool = False
     ) -> APIResponse:
         """
         Fetch hero compatibility data for a specific hero.
@@ -509,6 +966,7 @@ class MLBBDataFetcher:
             page_size (int): Number of results per page. Defaults to 20
             page_index (int): Page index for pagination. Defaults to 1
             rank (str): Rank filter value ("101"=All, "5"=Epic, "6"=Legend, "7"=Mythic, "8"=Honor, "9"=Glory). Defaults to "7"
+            all_pages (bool): Also fetch the pages after page_index and merge their records. Defaults to False
             
         Returns:
             APIResponse: Response containing compatibility data or error information
@@ -549,11 +1007,15 @@ class MLBBDataFetcher:
         
         headers = self._build_headers(language)
         
-        response = self._make_request(payload, headers)
+        if all_pages:
+            response = self._request_all_pages(payload, headers)
+        else:
+            response = self._make_request(payload, headers)
         
         # Save data to file if request was successful
         if response.success and response.data:
-            self._save_to_file(response.data, main_hero_id, "compatibility")
+            self._store_snapshot(response.data, main_hero_id, "compatibility", MatchType.COMPATIBILITY, rank,
+                                 language)
         
         return response
     
@@ -594,77 +1056,179 @@ class MLBBDataFetcher:
         
         return results
     
+    def _fetch_and_save(
+        self,
+        hero_id: int,
+        data_name: str,
+        language: str,
+        rank: str
+    ) -> bool:
+        """
+        Fetch and save all pages of one hero's counter or compatibility data.
+        
+        Args:
+            hero_id (int): The hero ID to fetch
+            data_name (str): Either "counters" or "compatibility"
+            language (str): Language code for localization
+            rank (str): Rank filter value
+            
+        Returns:
+            bool: True if the data was fetched and saved, False otherwise
+        """
+        label = "counter" if data_name == "counters" else "compatibility"
+        try:
+            if data_name == "counters":
+                response = self.get_hero_counters(hero_id, language, rank=rank, all_pages=True)
+            else:
+                response = self.get_hero_compatibility(hero_id, language, rank=rank, all_pages=True)
+        except Exception as e:
+            self.logger.error(f"Error processing rank {rank} hero {hero_id} {label} data: {str(e)}")
+            return False
+        
+        if response.success:
+            self.logger.info(f"✓ Rank {rank} hero {hero_id} {label} data saved")
+        else:
+            self.logger.warning(f"✗ Rank {rank} hero {hero_id} {label} data failed: {response.error_message}")
+        return response.success
+    
     def fetch_and_save_all_heroes(
         self,
         data_type: str = "both",
         language: str = "en",
         start_hero_id: int = 1,
         end_hero_id: int = 128,
-        rank: str = "7"
+        rank: str = "7",
+        workers: Optional[int] = None
     ) -> Dict[str, Dict[int, bool]]:
         """
         Fetch and save data for all heroes from start_hero_id to end_hero_id.
         
+        Same as fetch_and_save_ranks with a single rank, saved directly in the
+        data directory.
+        
         Args:
             data_type (str): Type of data to fetch ("counters", "compatibility", "both")
             language (str): Language code for localization
             start_hero_id (int): Starting hero ID (inclusive). Defaults to 1.
             end_hero_id (int): Ending hero ID (inclusive). Defaults to 128.
             rank (str): Rank filter value ("101"=All, "5"=Epic, "6"=Legend, "7"=Mythic, "8"=Honor, "9"=Glory). Defaults to "7"
+            workers (Optional[int]): Concurrent requests. Defaults to the fetcher's workers.
             
         Returns:
             Dict[str, Dict[int, bool]]: Results showing success/failure for each hero and data type
             
         Example:
-            >>> fetcher = MLBBDataFetcher()
+            >>> fetcher = MLBBDataFetcher(workers=8, rate_limit=10)
             >>> results = fetcher.fetch_and_save_all_heroes(rank="7")
             >>> print(f"Counter data saved for {sum(results['counters'].values())} heroes")
         """
+        return self.fetch_and_save_ranks(
+            [rank], data_type, language, start_hero_id, end_hero_id, workers, partition=False
+        )[rank]
+    
+    def fetch_and_save_ranks(
+        self,
+        ranks: List[str],
+        data_type: str = "both",
+        language: str = "en",
+        start_hero_id: int = 1,
+        end_hero_id: int = 128,
+        workers: Optional[int] = None,
+        partition: bool = True
+    ) -> Dict[str, Dict[str, Dict[int, bool]]]:
+        """
+        Fetch and save all pages of data for heroes start_hero_id to
+        end_hero_id in every rank tier.
+        
+        Requests run concurrently on a thread pool of `workers` threads, all
+        sharing the fetcher's global rate limit. They are queued with the
+        tiers interleaved (hero 1 of every tier, then hero 2, ...), so all
+        tiers progress together. With `partition`, each tier is saved to its
+        own rank_<tier> subdirectory of the data directory, so tiers never
+        overwrite each other. Afterwards the manifest is saved and the heroes
+        whose data changed are listed in each tier's changed_heroes.json (and
+        in `changed_heroes`).
+        
+        Args:
+            ranks (List[str]): Rank filter values, e.g. ["5", "6", "7", "8", "9"]
+            data_type (str): Type of data to fetch ("counters", "compatibility", "both")
+            language (str): Language code for localization
+            start_hero_id (int): Starting hero ID (inclusive). Defaults to 1.
+            end_hero_id (int): Ending hero ID (inclusive). Defaults to 128.
+            workers (Optional[int]): Concurrent requests. Defaults to the fetcher's workers.
+            partition (bool): Save each tier to data_directory/rank_<tier>. Defaults to True.
+            
+        Returns:
+            Dict[str, Dict[str, Dict[int, bool]]]: Success/failure per rank, data type and hero
+            
+        Raises:
+            ValueError: If data_type or a rank is not recognized
+            
+        Example:
+            >>> fetcher = MLBBDataFetcher(workers=16, rate_limit=20)
+            >>> results = fetcher.fetch_and_save_ranks(["5", "6", "7", "8", "9"])
+            >>> print(f"Glory counter data saved for {sum(results['9']['counters'].values())} heroes")
+        """
         if data_type not in ["counters", "compatibility", "both"]:
             raise ValueError("data_type must be 'counters', 'compatibility', or 'both'")
-        
-        results = {"counters": {}, "compatibility": {}}
+        unknown = [rank for rank in ranks if rank not in self.RANK_NAMES]
+        if unknown:
+            raise ValueError(f"Unknown rank(s) {unknown}, expected one of {list(self.RANK_NAMES)}")
+        
+        ranks = list(dict.fromkeys(ranks))
+        for rank in ranks:
+            if partition:
+                self.rank_directories[rank] = self.data_directory / f"rank_{rank}"
+                self._ensure_data_directories(self.rank_directories[rank])
+            else:
+                self.rank_directories.pop(rank, None)
+            with self._manifest_lock:
+                self.changed_heroes[rank] = {"counters": set(), "compatibility": set()}
+        
+        workers = max(1, workers or self.workers)
+        self._size_connection_pool(workers)
+        data_names = [name for name in ("counters", "compatibility") if data_type in [name, "both"]]
+        # Tiers innermost, so the queue alternates between them
+        tasks = [(rank, hero_id, name)
+                 for hero_id in range(start_hero_id, end_hero_id + 1)
+                 for name in data_names
+                 for rank in ranks]
         total_heroes = end_hero_id - start_hero_id + 1
         
-        self.logger.info(f"Starting bulk fetch for heroes {start_hero_id}-{end_hero_id} ({total_heroes} heroes)")
+        self.logger.info(
+            f"Starting bulk fetch for heroes {start_hero_id}-{end_hero_id} in rank(s) {', '.join(ranks)} "
+            f"({total_heroes} heroes, {len(tasks)} requests, {workers} workers, "
+            f"rate limit {self.rate_limiter.rate or 'none'}/s)"
+        )
         
-        for hero_id in range(start_hero_id, end_hero_id + 1):
-            try:
-                self.logger.info(f"Processing hero {hero_id}/{end_hero_id}")
-                
-                if data_type in ["counters", "both"]:
-                    counter_response = self.get_hero_counters(hero_id, language, rank=rank)
-                    results["counters"][hero_id] = counter_response.success
-                    
-                    if counter_response.success:
-                        self.logger.info(f"✓ Hero {hero_id} counter data saved")
-                    else:
-                        self.logger.warning(f"✗ Hero {hero_id} counter data failed: {counter_response.error_message}")
-                
-                if data_type in ["compatibility", "both"]:
-                    compatibility_response = self.get_hero_compatibility(hero_id, language, rank=rank)
-                    results["compatibility"][hero_id] = compatibility_response.success
-                    
-                    if compatibility_response.success:
-                        self.logger.info(f"✓ Hero {hero_id} compatibility data saved")
-                    else:
-                        self.logger.warning(f"✗ Hero {hero_id} compatibility data failed: {compatibility_response.error_message}")
-                        
-            except Exception as e:
-                self.logger.error(f"Error processing hero {hero_id}: {str(e)}")
-                if data_type in ["counters", "both"]:
-                    results["counters"][hero_id] = False
-                if data_type in ["compatibility", "both"]:
-                    results["compatibility"][hero_id] = False
+        outcomes: Dict[tuple, bool] = {}
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(self._fetch_and_save, hero_id, name, language, rank): (rank, hero_id, name)
+                for rank, hero_id, name in tasks
+            }
+            for done, future in enumerate(as_completed(futures), 1):
+                outcomes[futures[future]] = future.result()
+                self.logger.info(f"Progress: {done}/{len(tasks)} requests finished")
+        
+        # Results in rank and hero order, whatever order the requests finished in
+        results = {rank: {"counters": {}, "compatibility": {}} for rank in ranks}
+        for rank in ranks:
+            for hero_id in range(start_hero_id, end_hero_id + 1):
+                for name in data_names:
+                    results[rank][name][hero_id] = outcomes[(rank, hero_id, name)]
         
         # Summary
-        if data_type in ["counters", "both"]:
-            counter_success = sum(results["counters"].values())
-            self.logger.info(f"Counter data: {counter_success}/{total_heroes} heroes successful")
-        
-        if data_type in ["compatibility", "both"]:
-            compatibility_success = sum(results["compatibility"].values())
-            self.logger.info(f"Compatibility data: {compatibility_success}/{total_heroes} heroes successful")
+        self.flush_snapshots()
+        self.save_manifest()
+        for rank in ranks:
+            for name in data_names:
+                successful = sum(results[rank][name].values())
+                changed = sorted(self.changed_heroes[rank][name])
+                self.logger.info(
+                    f"Rank {rank} {name} data: {successful}/{total_heroes} heroes successful, "
+                    f"{len(changed)} changed: {changed}"
+                )
         
         return results
 
@@ -704,6 +1268,28 @@ def parse_count_argument(count_arg: str) -> tuple[int, int]:
             raise ValueError(f"Invalid count argument: {count_arg}. Use 'all', single number, or range like '4-9'")
 
 
+def parse_rank_argument(rank_arg: str) -> List[str]:
+    """
+    Parse the rank argument into a list of rank filter values.
+    
+    Args:
+        rank_arg (str): One rank or a comma-separated list like "5,6,7,8,9"
+        
+    Returns:
+        List[str]: Rank values in the given order, without duplicates
+        
+    Raises:
+        argparse.ArgumentTypeError: If a rank is not a known rank value
+    """
+    ranks = list(dict.fromkeys(rank.strip() for rank in rank_arg.split(",") if rank.strip()))
+    unknown = [rank for rank in ranks if rank not in MLBBDataFetcher.RANK_NAMES]
+    if not ranks or unknown:
+        raise argparse.ArgumentTypeError(
+            f"invalid rank(s) {unknown or rank_arg!r}, choose from {', '.join(MLBBDataFetcher.RANK_NAMES)}"
+        )
+    return ranks
+
+
 def setup_cli_parser() -> argparse.ArgumentParser:
     """
     Setup command-line argument parser.
@@ -716,8 +1302,8 @@ def setup_cli_parser() -> argparse.ArgumentParser:
         formatter_class=argparse.RawDescriptionHelpFormatter,
         epilog="""
 Examples:
-  # Fetch counter data for all heroes with Mythic rank (default)
-  python src/DataFetching/fetch_data.py --select counter --count all --rank 7
+  # Fetch counter data for all heroes with Mythic rank (default) into data/
+  python src/DataFetching/fetch_data.py --select counter --count all
   
   # Fetch compatibility data for hero 1 with Glory rank
   python src/DataFetching/fetch_data.py --select compatibility --count 1 --rank 9
@@ -725,11 +1311,23 @@ Examples:
   # Fetch both types for heroes 4-9 with Epic rank
   python src/DataFetching/fetch_data.py --select both --count 4-9 --rank 5
   
-  # Fetch both types for hero 50 with all ranks
+  # Fetch both types for hero 50 with all ranks, saved to data/rank_101
   python src/DataFetching/fetch_data.py --select both --count 50 --rank 101
   
-  # Fetch counter data for heroes 10-20 with Legend rank
+  # Fetch counter data for heroes 10-20 with Legend rank, saved to data/rank_6
   python src/DataFetching/fetch_data.py --select counter --count 10-20 --rank 6
+  
+  # Fetch everything with 16 concurrent requests, at most 20 requests per second
+  python src/DataFetching/fetch_data.py --select both --count all --workers 16 --rate-limit 20
+  
+  # Nightly refresh: only rewrite heroes whose data changed since the last run
+  python src/DataFetching/fetch_data.py --select both --count all --incremental
+  
+  # Fetch several rank tiers in one run, saved to data/rank_5 ... data/rank_9
+  python src/DataFetching/fetch_data.py --select both --count all --rank 5,6,7,8,9
+  
+  # Write one JSON file per hero instead of the compressed snapshot store
+  python src/DataFetching/fetch_data.py --select both --count all --format json
 
 Rank Values:
   101 = All Ranks
@@ -756,9 +1354,10 @@ Rank Values:
     
     parser.add_argument(
         "--rank",
-        choices=["101", "5", "6", "7", "8", "9"],
-        default="7",
-        help="Rank filter: 101=All, 5=Epic, 6=Legend, 7=Mythic (default), 8=Honor, 9=Glory"
+        type=parse_rank_argument,
+        help="Rank filter: 101=All, 5=Epic, 6=Legend, 7=Mythic (default), 8=Honor, 9=Glory. "
+             "One or several comma-separated ranks (e.g. 5,6,7,8,9), each saved to <data-dir>/rank_<rank>. "
+             "Without --rank, Mythic data is saved directly to <data-dir>"
     )
     
     parser.add_argument(
@@ -787,6 +1386,35 @@ Rank Values:
         help="Maximum retry attempts for failed requests. Default: 3"
     )
     
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=MLBBDataFetcher.DEFAULT_WORKERS,
+        help=f"Concurrent requests for bulk fetches. Default: {MLBBDataFetcher.DEFAULT_WORKERS}"
+    )
+    
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        default=MLBBDataFetcher.DEFAULT_RATE_LIMIT,
+        help=f"Maximum requests per second across all workers, 0 for unlimited. Default: {MLBBDataFetcher.DEFAULT_RATE_LIMIT:g}"
+    )
+    
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only rewrite snapshots whose _updatedAt or content changed since the last run (see fetch_manifest.json)"
+    )
+    
+    parser.add_argument(
+        "--format",
+        choices=MLBBDataFetcher.SNAPSHOT_FORMATS,
+        default=MLBBDataFetcher.DEFAULT_SNAPSHOT_FORMAT,
+        help=f"How snapshots are saved: store = one compressed {STORE_FILE} per directory, json = one "
+             f"JSON file per hero (also exportable later with snapshot_store.py export), both. "
+             f"Default: {MLBBDataFetcher.DEFAULT_SNAPSHOT_FORMAT}"
+    )
+    
     parser.add_argument(
         "--verbose", "-v",
         action="store_true",
@@ -826,7 +1454,11 @@ def main():
         fetcher = MLBBDataFetcher(
             timeout=args.timeout,
             max_retries=args.max_retries,
-            data_directory=args.data_dir
+            data_directory=args.data_dir,
+            workers=args.workers,
+            rate_limit=args.rate_limit,
+            incremental=args.incremental,
+            snapshot_format=args.format
         )
         
         # Display execution plan
@@ -839,26 +1471,36 @@ def main():
             "8": "Honor Rank",
             "9": "Glory Rank"
         }
-        rank_display = f"{args.rank} ({rank_names.get(args.rank, 'Unknown')})"
+        # An explicit tier always gets its own directory, the one main.py --rank reads
+        partition = args.rank is not None
+        ranks = args.rank if partition else ["7"]
+        rank_display = ", ".join(f"{rank} ({rank_names.get(rank, 'Unknown')})" for rank in ranks)
         
         print(f"🚀 MLBB Data Fetcher Starting...")
         print(f"📊 Data Type: {args.select}")
         print(f"🎯 Heroes: {start_hero_id}-{end_hero_id} ({hero_count} heroes)")
         print(f"📈 Rank: {rank_display}")
         print(f"🌐 Language: {args.lang}")
-        print(f"📁 Data Directory: {args.data_dir}")
+        print(f"📁 Data Directory: {args.data_dir}{'/rank_<rank>' if partition else ''}")
         print(f"⏱️  Timeout: {args.timeout}s")
         print(f"🔄 Max Retries: {args.max_retries}")
+        print(f"🧵 Workers: {args.workers} (rate limit: {f'{args.rate_limit:g}/s' if args.rate_limit > 0 else 'none'})")
+        print(f"♻️  Incremental: {'yes' if args.incremental else 'no'}")
+        print(f"💾 Format: {args.format}")
         print("-" * 50)
         
         # Execute fetching
-        results = fetcher.fetch_and_save_all_heroes(
-            data_type=data_type,
-            language=args.lang,
-            start_hero_id=start_hero_id,
-            end_hero_id=end_hero_id,
-            rank=args.rank
-        )
+        try:
+            rank_results = fetcher.fetch_and_save_ranks(
+                ranks,
+                data_type=data_type,
+                language=args.lang,
+                start_hero_id=start_hero_id,
+                end_hero_id=end_hero_id,
+                partition=partition
+            )
+        finally:
+            fetcher.close()
         
         # Display results summary
         print("\n" + "=" * 50)
@@ -868,21 +1510,27 @@ def main():
         total_requests = 0
         total_successful = 0
         
-        for data_name, hero_results in results.items():
-            if hero_results:  # Only show if we have results for this data type
-                successful = sum(hero_results.values())
-                total = len(hero_results)
-                success_rate = (successful / total * 100) if total > 0 else 0
-                
-                print(f"📋 {data_name.capitalize()}:")
-                print(f"   ✅ Successful: {successful}/{total} ({success_rate:.1f}%)")
-                
-                if successful < total:
-                    failed_heroes = [hero_id for hero_id, success in hero_results.items() if not success]
-                    print(f"   ❌ Failed Heroes: {failed_heroes}")
-                
-                total_requests += total
-                total_successful += successful
+        for rank, results in rank_results.items():
+            if partition:
+                print(f"📈 Rank {rank} ({rank_names.get(rank, 'Unknown')}):")
+            for data_name, hero_results in results.items():
+                if hero_results:  # Only show if we have results for this data type
+                    successful = sum(hero_results.values())
+                    total = len(hero_results)
+                    success_rate = (successful / total * 100) if total > 0 else 0
+                    
+                    print(f"📋 {data_name.capitalize()}:")
+                    print(f"   ✅ Successful: {successful}/{total} ({success_rate:.1f}%)")
+                    
+                    if successful < total:
+                        failed_heroes = [hero_id for hero_id, success in hero_results.items() if not success]
+                        print(f"   ❌ Failed Heroes: {failed_heroes}")
+                    
+                    heroes = fetcher.changed_heroes[rank][data_name]
+                    print(f"   🔁 Changed: {len(heroes)} heroes {sorted(heroes) if heroes else ''}")
+                    
+                    total_requests += total
+                    total_successful += successful
         
         overall_success_rate = (total_successful / total_requests * 100) if total_requests > 0 else 0
         print(f"\n🎯 Overall Success Rate: {total_successful}/{total_requests} ({overall_success_rate:.1f}%)")
@@ -930,7 +1578,7 @@ if __name__ == "__main__":
         if counter_response.success:
             print("✓ Successfully fetched and saved counter data for hero 1")
             print(f"Status Code: {counter_response.status_code}")
-            print("Data saved to: data/hero_counter/1.json")
+            print(f"Data saved to: data/{STORE_FILE}")
         else:
             print("✗ Failed to fetch counter data")
             print(f"Error: {counter_response.error_message}")
@@ -941,11 +1589,14 @@ if __name__ == "__main__":
         if compatibility_response.success:
             print("✓ Successfully fetched and saved compatibility data for hero 1")
             print(f"Status Code: {compatibility_response.status_code}")
-            print("Data saved to: data/hero_compatibility/1.json")
+            print(f"Data saved to: data/{STORE_FILE}")
         else:
             print("✗ Failed to fetch compatibility data")
             print(f"Error: {compatibility_response.error_message}")
         
+        # Writes the snapshot store
+        fetcher.close()
+        
         print("\n" + "=" * 50)
         print("📋 CLI USAGE EXAMPLES")
         print("=" * 50)
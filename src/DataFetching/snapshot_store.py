@@ -0,0 +1,367 @@
+"""
+MLBB Draft Assistant - Snapshot Store
+
+Packs the counter and compatibility snapshots of one data directory into a
+single compressed, indexed file instead of one pretty-printed JSON file per
+hero and data type.
+
+File layout:
+    MAGIC | uint64 header length | JSON header | records
+The header holds the store's metadata and an offset table that maps each
+key ("hero_counter/1", "hero_compatibility/1", ...) to the offset of its
+record (relative to the end of the header), its size and the SHA-256 of its
+JSON. Each record is a uint32 length followed by the zlib-compressed compact
+JSON of the API response, so a single hero is read with one seek and one
+decompression. Stores are written to a temporary file and moved into place.
+
+Usage:
+    python src/DataFetching/snapshot_store.py pack --data-dir data
+    python src/DataFetching/snapshot_store.py export --data-dir data
+    python src/DataFetching/snapshot_store.py info --data-dir data/rank_9
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import struct
+import sys
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+MAGIC = b"MLBBSNP1"
+STORE_FILE = "snapshots.mlbbsnap"
+KINDS = ("hero_counter", "hero_compatibility")
+MAX_HERO_ID = 128
+COMPRESS_LEVEL = 9
+_LENGTH = struct.Struct("<I")
+
+
+def snapshot_key(kind: str, hero_id: int) -> str:
+    """Key of a snapshot in the store, e.g. "hero_counter/1"."""
+    return f"{kind}/{hero_id}"
+
+
+def latest_update(data: Dict[str, Any]) -> int:
+    """Newest _updatedAt among the records of an API response, 0 if it has none."""
+    records = (data.get("data") or {}).get("records") or []
+    return max((record.get("_updatedAt") or 0 for record in records), default=0)
+
+
+def encode_snapshot(data: Dict[str, Any]) -> Tuple[bytes, str]:
+    """
+    Compress one API response for the store.
+
+    Args:
+        data (Dict[str, Any]): The API response data
+
+    Returns:
+        Tuple[bytes, str]: Length-prefixed compressed record and the SHA-256 of its JSON
+    """
+    raw = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    compressed = zlib.compress(raw, COMPRESS_LEVEL)
+    return _LENGTH.pack(len(compressed)) + compressed, hashlib.sha256(raw).hexdigest()
+
+
+class SnapshotStore:
+    """
+    Read access to a snapshot store file.
+
+    Only the header is read on open; snapshots are read and decompressed
+    one at a time. Reads are thread-safe.
+
+    Attributes:
+        path (Path): The store file
+        meta (Dict[str, Any]): Metadata written with the store
+        index (Dict[str, List]): Key -> [offset, size, sha256] of each record
+    """
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        """
+        Open a store and read its header.
+
+        Args:
+            path (Union[str, Path]): The store file
+
+        Raises:
+            ValueError: If the file is not a snapshot store
+        """
+        self.path = Path(path)
+        self._file = open(self.path, "rb")
+        self._lock = threading.Lock()
+        try:
+            if self._file.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{self.path} is not a snapshot store")
+            (header_length,) = struct.unpack("<Q", self._file.read(8))
+            header = json.loads(self._file.read(header_length))
+        except Exception:
+            self._file.close()
+            raise
+        self.meta: Dict[str, Any] = header.get("meta", {})
+        self.index: Dict[str, List] = header["index"]
+        self._data_start = len(MAGIC) + 8 + header_length
+
+    def __enter__(self) -> "SnapshotStore":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the store file."""
+        self._file.close()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.index
+
+    def keys(self) -> List[str]:
+        """All keys in the store, in file order."""
+        return list(self.index)
+
+    def read_record(self, key: str) -> Optional[bytes]:
+        """
+        Read the raw length-prefixed compressed record of a key.
+
+        Args:
+            key (str): Snapshot key, see snapshot_key
+
+        Returns:
+            Optional[bytes]: The record, or None if the key is not in the store
+        """
+        entry = self.index.get(key)
+        if entry is None:
+            return None
+        offset, size = entry[0], entry[1]
+        with self._lock:
+            self._file.seek(self._data_start + offset)
+            return self._file.read(size)
+
+    def get(self, kind: str, hero_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Read and decompress one snapshot.
+
+        Args:
+            kind (str): "hero_counter" or "hero_compatibility"
+            hero_id (int): The hero ID
+
+        Returns:
+            Optional[Dict[str, Any]]: The API response, or None if it is not in the store
+        """
+        record = self.read_record(snapshot_key(kind, hero_id))
+        if record is None:
+            return None
+        (length,) = _LENGTH.unpack_from(record)
+        return json.loads(zlib.decompress(record[_LENGTH.size:_LENGTH.size + length]))
+
+    def hashes(self) -> Dict[str, str]:
+        """SHA-256 of the JSON of each snapshot, by key, without decompressing anything."""
+        return {key: entry[2] for key, entry in self.index.items()}
+
+    def items(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Yield (key, API response) for every snapshot."""
+        for key in self.index:
+            kind, hero_id = key.split("/")
+            yield key, self.get(kind, int(hero_id))
+
+
+def open_store(data_directory: Union[str, Path]) -> Optional[SnapshotStore]:
+    """
+    Open the store of a data directory.
+
+    Args:
+        data_directory (Union[str, Path]): Directory that may hold a store file
+
+    Returns:
+        Optional[SnapshotStore]: The store, or None if the directory has none
+    """
+    path = Path(data_directory) / STORE_FILE
+    return SnapshotStore(path) if path.exists() else None
+
+
+def write_store(
+    path: Union[str, Path],
+    snapshots: Dict[str, Dict[str, Any]],
+    meta: Optional[Dict[str, Any]] = None,
+    base: Optional[SnapshotStore] = None
+) -> int:
+    """
+    Write a store atomically.
+
+    Records of `base` that `snapshots` does not replace are copied over
+    without being decompressed, so updating a few heroes of a store only
+    compresses those heroes.
+
+    Args:
+        path (Union[str, Path]): The store file to write
+        snapshots (Dict[str, Dict[str, Any]]): API responses by key (see snapshot_key)
+        meta (Optional[Dict[str, Any]]): Extra metadata for the header
+        base (Optional[SnapshotStore]): Existing store to merge with
+
+    Returns:
+        int: Number of snapshots in the written store
+    """
+    path = Path(path)
+    records: Dict[str, Tuple[bytes, str]] = {}
+    if base is not None:
+        for key in base.keys():
+            if key not in snapshots:
+                records[key] = (base.read_record(key), base.index[key][2])
+    for key, data in snapshots.items():
+        records[key] = encode_snapshot(data)
+
+    def order(key: str) -> Tuple[int, int]:
+        kind, hero_id = key.split("/")
+        return KINDS.index(kind) if kind in KINDS else len(KINDS), int(hero_id)
+
+    index: Dict[str, List] = {}
+    offset = 0
+    for key in sorted(records, key=order):
+        record, digest = records[key]
+        index[key] = [offset, len(record), digest]
+        offset += len(record)
+    header = json.dumps({
+        "meta": {**(meta or {}), "created": time.strftime("%Y-%m-%dT%H:%M:%S"), "count": len(index)},
+        "index": index
+    }, separators=(",", ":")).encode("utf-8")
+
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC + struct.pack("<Q", len(header)) + header)
+        for key in index:
+            f.write(records[key][0])
+    os.replace(tmp_path, path)
+    return len(index)
+
+
+def pack_directory(data_directory: Union[str, Path], force: bool = False) -> Tuple[int, int]:
+    """
+    Pack the JSON snapshots of a data directory into its store, keeping any
+    snapshots the store already holds that have no JSON file.
+
+    A JSON file only replaces a store record if its newest _updatedAt is
+    later, or equal and the file was modified after the store. Without
+    this, JSON files left behind by an older run would roll the store back.
+
+    Args:
+        data_directory (Union[str, Path]): Directory with hero_counter/ and hero_compatibility/
+        force (bool): Replace store records with the JSON files regardless. Defaults to False.
+
+    Returns:
+        Tuple[int, int]: Number of snapshots in the written store, and of
+            JSON files skipped because the store record was newer
+    """
+    data_directory = Path(data_directory)
+    base = open_store(data_directory)
+    store_mtime = base.path.stat().st_mtime if base is not None else 0
+    snapshots = {}
+    skipped = 0
+    try:
+        for kind in KINDS:
+            for hero_id in range(1, MAX_HERO_ID + 1):
+                path = data_directory / kind / f"{hero_id}.json"
+                try:
+                    with open(path, "r", encoding="utf-8") as f:
+                        data = json.load(f)
+                    mtime = path.stat().st_mtime
+                except (OSError, ValueError):
+                    continue
+                stored = base.get(kind, hero_id) if base is not None and not force else None
+                if stored is not None:
+                    stored_update, json_update = latest_update(stored), latest_update(data)
+                    if stored_update > json_update or (stored_update == json_update and mtime <= store_mtime):
+                        skipped += 1
+                        continue
+                snapshots[snapshot_key(kind, hero_id)] = data
+        return write_store(data_directory / STORE_FILE, snapshots, {"source": "json"}, base), skipped
+    finally:
+        if base is not None:
+            base.close()
+
+
+def export_json(data_directory: Union[str, Path], output_directory: Optional[Union[str, Path]] = None) -> int:
+    """
+    Export a store to the JSON layout written by the fetcher
+    (hero_counter/<id>.json and hero_compatibility/<id>.json).
+
+    Args:
+        data_directory (Union[str, Path]): Directory holding the store
+        output_directory (Optional[Union[str, Path]]): Where to write the JSON files. Defaults to data_directory
+
+    Returns:
+        int: Number of files written
+
+    Raises:
+        FileNotFoundError: If the directory has no store
+    """
+    store = open_store(data_directory)
+    if store is None:
+        raise FileNotFoundError(f"No {STORE_FILE} in {data_directory}")
+    output_directory = Path(output_directory or data_directory)
+    written = 0
+    with store:
+        for key, data in store.items():
+            kind, hero_id = key.split("/")
+            (output_directory / kind).mkdir(parents=True, exist_ok=True)
+            with open(output_directory / kind / f"{hero_id}.json", "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2, ensure_ascii=False)
+            written += 1
+    return written
+
+
+def main() -> None:
+    """
+    Main function for command-line interface.
+    """
+    parser = argparse.ArgumentParser(
+        description="MLBB Draft Assistant - Pack, export or inspect a snapshot store",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Pack the JSON snapshots in data/ into data/snapshots.mlbbsnap
+  python src/DataFetching/snapshot_store.py pack --data-dir data
+
+  # Overwrite the store with the JSON files even where the store is newer
+  python src/DataFetching/snapshot_store.py pack --data-dir data --force
+
+  # Export a tier's store back to hero_counter/ and hero_compatibility/ JSON files
+  python src/DataFetching/snapshot_store.py export --data-dir data/rank_9
+        """
+    )
+    parser.add_argument("action", choices=["pack", "export", "info"], help="What to do with the store")
+    parser.add_argument("--data-dir", default="data", help="Directory of the store. Default: data")
+    parser.add_argument("--output-dir", help="Export: directory for the JSON files. Default: --data-dir")
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Pack: replace store records with the JSON files even if the store's data is newer"
+    )
+    args = parser.parse_args()
+
+    try:
+        if args.action == "pack":
+            count, skipped = pack_directory(args.data_dir, args.force)
+            size = (Path(args.data_dir) / STORE_FILE).stat().st_size
+            print(f"📦 Packed {count} snapshots into {Path(args.data_dir) / STORE_FILE} ({size / 1024:.0f} KB)")
+            if skipped:
+                print(f"⏭️  Kept {skipped} newer store records over their JSON files (use --force to replace them)")
+        elif args.action == "export":
+            count = export_json(args.data_dir, args.output_dir)
+            print(f"📁 Exported {count} snapshots to {Path(args.output_dir or args.data_dir).absolute()}")
+        else:
+            store = open_store(args.data_dir)
+            if store is None:
+                raise FileNotFoundError(f"No {STORE_FILE} in {args.data_dir}")
+            with store:
+                print(json.dumps(store.meta, indent=2))
+                for kind in KINDS:
+                    print(f"{kind}: {sum(key.startswith(kind + '/') for key in store.keys())} snapshots")
+    except (OSError, ValueError) as e:
+        print(f"💥 Error: {str(e)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Batch/offline suggestion mode for the MLBB Draft Assistant.
+
+Streams draft states from a JSONL or CSV file, scores them in chunks with
+one model call per chunk across a process pool, and streams the results
+out in input order as JSONL. Only a bounded number of chunks is in flight
+at any time, so arbitrarily large files are never loaded whole.
+
+Input fields (JSONL keys or CSV columns): team_pick, team_ban, enemy_pick,
+enemy_ban and optionally suggest. A game-length profile (matrix engine)
+applies to the whole run. Heroes are names or IDs, given as a
+comma-separated string or (JSONL only) a list.
+"""
+import csv
+import json
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import matrix_scorer
+from main import DRAFT_FIELDS, load_engine, parse_hero_arg, suggest_heroes_batch, validate_draft
+from profiling import PROFILER, ProfileLog
+
+# Chunks queued per worker before the reader waits for results
+CHUNKS_PER_WORKER = 2
+
+_worker_model = None
+_worker_engine = None
+
+
+def read_drafts(path):
+    """Yields one dict per draft from a .csv file or a JSONL file."""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        if path.lower().endswith('.csv'):
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+
+
+def parse_draft(record, default_suggest):
+    """
+    Turns an input record into a (team_pick, team_ban, enemy_pick, enemy_ban,
+    n_suggest) tuple. Raises ValueError for unknown heroes or invalid drafts.
+    """
+    draft = [parse_hero_arg(record.get(field), exit_on_error=False) for field in DRAFT_FIELDS]
+    error = validate_draft(*draft)
+    if error:
+        raise ValueError(error)
+    return (*draft, int(record.get('suggest') or default_suggest))
+
+
+def init_worker(engine, rank='', profile=False, game_length=''):
+    global _worker_model, _worker_engine
+    if profile:
+        PROFILER.enable()
+    _worker_model = load_engine(engine, rank)
+    if game_length:
+        _worker_model = matrix_scorer.profile_matrices(_worker_model, game_length)
+    _worker_engine = engine
+
+
+def score_chunk(records, default_suggest):
+    """
+    Scores one chunk of raw input records. Invalid records get an error
+    entry instead of failing the chunk. Returns the results and the phase
+    records of the chunk (empty unless profiling).
+    """
+    drafts, results = [], []
+    with PROFILER.phase('parse_drafts'):
+        for record in records:
+            try:
+                drafts.append(parse_draft(record, default_suggest))
+                results.append(None)
+            except (ValueError, TypeError, AttributeError) as e:
+                results.append({'error': str(e)})
+    suggestions = iter(suggest_heroes_batch(drafts, _worker_model, engine=_worker_engine))
+    results = [result if result is not None else {'suggestions': next(suggestions)} for result in results]
+    return results, PROFILER.collect()
+
+
+def iter_chunks(records, chunk_size):
+    records = iter(records)
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def run_batch(input_path, output_path='', engine='forest', workers=1, chunk_size=256, default_suggest=5, rank='',
+              profile_log='', game_length=''):
+    """
+    Scores every draft in input_path with the model of the given rank tier and
+    writes one JSON result per line (with its 0-based input index) to
+    output_path, or stdout. With profile_log, each chunk's phase records are
+    appended to that file.
+    """
+    start = time.perf_counter()
+    chunks = iter_chunks(read_drafts(input_path), chunk_size)
+    out = open(output_path, 'w', encoding='utf-8') if output_path else sys.stdout
+    log = ProfileLog(profile_log) if profile_log else None
+    index = 0
+    chunk_index = 0
+
+    def write(chunk_result):
+        nonlocal index, chunk_index
+        results, records = chunk_result
+        if log:
+            log.write(records, mode='batch', chunk=chunk_index, drafts=len(results))
+        chunk_index += 1
+        for result in results:
+            out.write(json.dumps({'index': index, **result}) + '\n')
+            index += 1
+
+    try:
+        if workers <= 1:
+            init_worker(engine, rank, bool(log), game_length)
+            for chunk in chunks:
+                write(score_chunk(chunk, default_suggest))
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(engine, rank, bool(log), game_length)) as pool:
+                pending = deque()
+                for chunk in chunks:
+                    pending.append(pool.submit(score_chunk, chunk, default_suggest))
+                    if len(pending) >= workers * CHUNKS_PER_WORKER:
+                        write(pending.popleft().result())
+                while pending:
+                    write(pending.popleft().result())
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        if log:
+            log.close()
+    elapsed = time.perf_counter() - start
+    rate = index / elapsed if elapsed > 0 else 0.0
+    print(f'Scored {index} drafts in {elapsed:.2f}s ({rate:.1f} drafts/s, {workers} worker(s), engine {engine})',
+          file=sys.stderr)
+    return index
@@ -0,0 +1,211 @@
+"""
+Compact, memory-mappable forest artifact for the MLBB Draft Assistant.
+
+The trained RandomForestClassifier is flattened into plain NumPy arrays
+(node features, thresholds, children and leaf class distributions of all
+trees, concatenated) and stored together with the hero index mapping in a
+single file. Loading memory-maps the arrays, so startup does not unpickle
+any sklearn objects and several worker processes share the same pages.
+Inference is a pure-NumPy traversal of all trees at once.
+
+The suggestor's inputs are 0/1 hero flags, and rows have only a handful of
+flags set, so most splits send a row left. For such binary forests the file
+also stores a jump table: for each node and feature, how many steps down the
+node's chain of left children the first split on that feature is. A row then
+skips straight to its next right turn, needing about one step per hero flag
+instead of one per tree level. The steps are bounded by the tree depth, so
+the table is stored as uint8 for trees up to 255 levels deep.
+
+File layout:
+    MAGIC | uint64 header length | JSON header | arrays (64-byte aligned)
+The header lists each array's dtype, shape and byte offset.
+"""
+import json
+import os
+import struct
+
+import numpy as np
+
+COMPACT_MODEL_PATH = os.path.join(os.path.dirname(__file__), 'hero_suggestor_model.forest')
+
+MAGIC = b'MLBBFRST'
+FORMAT_VERSION = 2
+ALIGNMENT = 64
+# Rows scored per traversal pass, to bound the temporary arrays
+ROW_CHUNK = 4096
+
+
+def export_compact_model(clf, feature_heroes, path=COMPACT_MODEL_PATH):
+    """
+    Flattens a fitted RandomForestClassifier and the hero ID of each of its
+    input columns into the compact format and writes it atomically to path.
+    """
+    features, thresholds, lefts, rights, leaf_index, leaf_values, roots = [], [], [], [], [], [], []
+    node_offset = 0
+    leaf_offset = 0
+    for estimator in clf.estimators_:
+        tree = estimator.tree_
+        is_leaf = tree.children_left < 0
+        n_nodes = tree.node_count
+        roots.append(node_offset)
+        features.append(np.where(is_leaf, -1, tree.feature).astype(np.int32))
+        thresholds.append(tree.threshold.astype(np.float32))
+        lefts.append(np.where(is_leaf, -1, tree.children_left + node_offset).astype(np.int32))
+        rights.append(np.where(is_leaf, -1, tree.children_right + node_offset).astype(np.int32))
+        index = np.full(n_nodes, -1, dtype=np.int32)
+        index[is_leaf] = np.arange(is_leaf.sum()) + leaf_offset
+        leaf_index.append(index)
+        values = tree.value[is_leaf, 0, :]
+        leaf_values.append((values / values.sum(axis=1, keepdims=True)).astype(np.float32))
+        node_offset += n_nodes
+        leaf_offset += int(is_leaf.sum())
+    arrays = {
+        'feature': np.concatenate(features),
+        'threshold': np.concatenate(thresholds),
+        'left': np.concatenate(lefts),
+        'right': np.concatenate(rights),
+        'leaf_index': np.concatenate(leaf_index),
+        'leaf_values': np.concatenate(leaf_values),
+        'roots': np.array(roots, dtype=np.int32),
+        'classes': np.asarray(clf.classes_, dtype=np.int32),
+        'feature_heroes': np.asarray(feature_heroes, dtype=np.int32),
+    }
+    internal = np.flatnonzero(arrays['feature'] >= 0)
+    binary = bool(np.all((arrays['threshold'][internal] >= 0) & (arrays['threshold'][internal] < 1)))
+    # The jump table relies on depth-first node order: a left child directly follows its parent
+    binary = binary and bool(np.all(arrays['left'][internal] == internal + 1))
+    if binary:
+        arrays['jump'] = build_jump_table(arrays, clf.n_features_in_)
+    write_arrays(path, arrays, {'n_trees': len(roots), 'binary': binary})
+
+
+def build_jump_table(arrays, n_features):
+    """
+    In depth-first order the chain of left children from node n is n, n + 1,
+    n + 2, ... jump[n, f] is the number of steps from n to the first node on
+    that chain that splits on feature f, or to the leaf ending the chain.
+    Column n_features is a sentinel that always gives the chain's leaf. The
+    table uses the smallest unsigned dtype that holds the longest chain.
+    """
+    feature = arrays['feature']
+    n_nodes = len(feature)
+    jump = np.zeros((n_nodes, n_features + 1), dtype=np.int32)
+    for node in range(n_nodes - 1, -1, -1):
+        if feature[node] >= 0:
+            jump[node] = jump[node + 1] + 1
+            jump[node, feature[node]] = 0
+    longest = int(jump.max(initial=0))
+    return jump.astype(next(t for t in (np.uint8, np.uint16, np.uint32) if longest <= np.iinfo(t).max))
+
+
+def write_arrays(path, arrays, meta):
+    header = {'format_version': FORMAT_VERSION, 'meta': meta, 'arrays': {}}
+    offset = 0
+    for name, array in arrays.items():
+        offset = -(-offset // ALIGNMENT) * ALIGNMENT
+        header['arrays'][name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+        offset += array.nbytes
+    header_bytes = json.dumps(header).encode('utf-8')
+    data_start = -(-(len(MAGIC) + 8 + len(header_bytes)) // ALIGNMENT) * ALIGNMENT
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC + struct.pack('<Q', len(header_bytes)) + header_bytes)
+        for name, array in arrays.items():
+            f.seek(data_start + header['arrays'][name]['offset'])
+            f.write(np.ascontiguousarray(array).tobytes())
+    os.replace(tmp_path, path)
+
+
+def read_arrays(path):
+    """Memory-maps every array in a compact file. Returns (arrays, meta)."""
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f'{path} is not a compact model file')
+        (header_len,) = struct.unpack('<Q', f.read(8))
+        header = json.loads(f.read(header_len))
+    if header['format_version'] != FORMAT_VERSION:
+        raise ValueError(f"unsupported compact model version {header['format_version']} in {path}, "
+                         f"retrain with --train to rebuild it")
+    data_start = -(-(len(MAGIC) + 8 + header_len) // ALIGNMENT) * ALIGNMENT
+    arrays = {}
+    for name, spec in header['arrays'].items():
+        shape = tuple(spec['shape'])
+        if 0 in shape:
+            arrays[name] = np.zeros(shape, dtype=spec['dtype'])
+        else:
+            mapped = np.memmap(path, dtype=spec['dtype'], mode='r', offset=data_start + spec['offset'], shape=shape)
+            # Plain ndarray views of the mapping avoid np.memmap's per-indexing overhead
+            arrays[name] = mapped.view(np.ndarray)
+    return arrays, header['meta']
+
+
+class CompactForest:
+    """
+    Read-only forest backed by memory-mapped arrays. Exposes the parts of
+    the RandomForestClassifier interface the suggestor uses: classes_ and
+    predict_proba.
+    """
+
+    def __init__(self, path=COMPACT_MODEL_PATH):
+        arrays, self.meta = read_arrays(path)
+        self.feature = arrays['feature']
+        self.threshold = arrays['threshold']
+        self.left = arrays['left']
+        self.right = arrays['right']
+        self.leaf_index = arrays['leaf_index']
+        self.leaf_values = arrays['leaf_values']
+        self.roots = np.asarray(arrays['roots'], dtype=np.intp)
+        self.jump = arrays.get('jump')
+        self.classes_ = np.asarray(arrays['classes'])
+        self.feature_heroes = np.asarray(arrays['feature_heroes'])
+        self.n_classes_ = len(self.classes_)
+
+    def apply(self, X):
+        """Returns the leaf node each row reaches in each tree, shape (rows, trees)."""
+        X = np.asarray(X)
+        if self.jump is not None and np.all((X == 0) | (X == 1)):
+            return self._apply_binary(X)
+        n_rows, n_trees = len(X), len(self.roots)
+        nodes = np.tile(self.roots, n_rows)
+        rows = np.repeat(np.arange(n_rows), n_trees)
+        active = np.flatnonzero(self.feature[nodes] >= 0)
+        while active.size:
+            node = nodes[active]
+            feature = self.feature[node]
+            go_left = X[rows[active], feature] <= self.threshold[node]
+            nodes[active] = np.where(go_left, self.left[node], self.right[node])
+            active = active[self.feature[nodes[active]] >= 0]
+        return nodes.reshape(n_rows, n_trees)
+
+    def _apply_binary(self, X):
+        """apply for 0/1 inputs, using the jump table to skip runs of left turns."""
+        n_rows, n_trees = len(X), len(self.roots)
+        sentinel = self.jump.shape[1] - 1
+        # Each row's set features, padded with the sentinel column
+        present = X != 0
+        width = max(int(present.sum(axis=1).max(initial=0)), 1)
+        padded = np.full((n_rows, width), sentinel, dtype=np.intp)
+        rows, cols = np.nonzero(present)
+        slots = np.arange(len(rows)) - np.searchsorted(rows, rows)
+        padded[rows, slots] = cols
+        nodes = np.tile(self.roots, n_rows)
+        features = np.repeat(padded, n_trees, axis=0)
+        active = np.arange(len(nodes))
+        while active.size:
+            node = nodes[active]
+            # The nearest split on any of the row's features ends the run of left turns
+            stop = node + self.jump[node[:, None], features[active]].min(axis=1)
+            is_leaf = self.feature[stop] < 0
+            nodes[active] = np.where(is_leaf, stop, self.right[stop])
+            active = active[~is_leaf]
+        return nodes.reshape(n_rows, n_trees)
+
+    def predict_proba(self, X):
+        X = np.asarray(X)
+        proba = np.zeros((len(X), self.n_classes_), dtype=np.float64)
+        for start in range(0, len(X), ROW_CHUNK):
+            leaves = self.leaf_index[self.apply(X[start:start + ROW_CHUNK])]
+            chunk = proba[start:start + ROW_CHUNK]
+            for tree in range(leaves.shape[1]):
+                chunk += self.leaf_values[leaves[:, tree]]
+        return proba / len(self.roots)
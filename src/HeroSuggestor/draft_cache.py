@@ -0,0 +1,120 @@
+"""
+Canonical draft-state cache for the MLBB Draft Assistant.
+
+Popular openers repeat, so many suggestion requests share the same draft
+state. DraftCache memoizes suggest_heroes results under a canonical key:
+the order-insensitive sets of team picks, team bans, enemy picks and enemy
+bans, plus the number of suggestions, the engine, the rank tier and the
+model version.
+Entries are evicted least-recently-used first and can be persisted to a
+JSON file so the cache survives restarts.
+"""
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from main import suggest_heroes
+
+DEFAULT_MAX_ENTRIES = 4096
+
+
+def model_version(path):
+    """
+    Identifies a model file by its modification time and size, so cached
+    results are not reused after a retrain.
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return 'missing'
+    return f'{st.st_mtime_ns}-{st.st_size}'
+
+
+def draft_key(team_pick, team_ban, enemy_pick, enemy_ban, n_suggest, engine, version, rank=''):
+    """Builds the canonical string key of a draft state."""
+    def ids(heroes):
+        return ','.join(str(h) for h in sorted(set(heroes)))
+    return (f'tp:{ids(team_pick)}|tb:{ids(team_ban)}|ep:{ids(enemy_pick)}|eb:{ids(enemy_ban)}'
+            f'|n:{n_suggest}|{engine}|{version}|rank:{rank}')
+
+
+class DraftCache:
+    """Thread-safe LRU cache of suggestion lists with hit/miss statistics."""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, path=None):
+        self.max_entries = max_entries
+        self.path = path
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        if path:
+            self.load()
+
+    def get(self, key):
+        with self._lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def load(self):
+        """Loads persisted entries; a missing or unreadable file starts empty."""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return
+        with self._lock:
+            for key, value in entries[-self.max_entries:]:
+                self.entries[key] = value
+
+    def save(self):
+        """Writes the entries (oldest first) atomically to self.path."""
+        if not self.path:
+            return
+        with self._lock:
+            entries = list(self.entries.items())
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entries, f)
+        os.replace(tmp_path, self.path)
+
+
+def cached_suggest(cache, team_pick, team_ban, enemy_pick, enemy_ban, n_suggest, version,
+                   model_data=None, engine='forest', rank=''):
+    """
+    suggest_heroes behind the cache. version identifies the loaded model
+    (see model_version).
+    """
+    key = draft_key(team_pick, team_ban, enemy_pick, enemy_ban, n_suggest, engine, version, rank)
+    suggestions = cache.get(key)
+    if suggestions is None:
+        suggestions = suggest_heroes(team_pick, team_ban, enemy_pick, enemy_ban, n_suggest,
+                                     model_data=model_data, engine=engine, rank=rank)
+        cache.put(key, suggestions)
+    return suggestions
@@ -0,0 +1,237 @@
+"""
+Lookahead draft search for the MLBB Draft Assistant.
+
+Plays the remaining draft forward using the real pick/ban order and
+recommends the pick that leads to the best final composition, not just
+the best next pick. The search is a depth-limited minimax over a beam of
+the most promising heroes at each step, with iterative deepening so that
+a node budget or wall-clock deadline always leaves a usable answer.
+
+Draft states are encoded as bitmasks over the 128 hero IDs (bit i is hero
+ID i + 1), which makes them cheap to hash for the transposition table.
+"""
+import time
+
+import numpy as np
+
+import matrix_scorer
+from main import MAX_BAN, suggest_heroes
+from profiling import PROFILER
+
+# Sides are relative to the draft order: 'first' is the side with first pick
+RANKED_ORDER = (
+    [('first', 'ban'), ('second', 'ban')] * MAX_BAN
+    + [('first', 'pick'), ('second', 'pick'), ('second', 'pick'), ('first', 'pick'), ('first', 'pick'),
+       ('second', 'pick'), ('second', 'pick'), ('first', 'pick'), ('first', 'pick'), ('second', 'pick')]
+)
+TOURNAMENT_ORDER = (
+    [('first', 'ban'), ('second', 'ban')] * 3
+    + [('first', 'pick'), ('second', 'pick'), ('second', 'pick'), ('first', 'pick'), ('first', 'pick'), ('second', 'pick')]
+    + [('second', 'ban'), ('first', 'ban')] * 2
+    + [('second', 'pick'), ('first', 'pick'), ('first', 'pick'), ('second', 'pick')]
+)
+DRAFT_ORDERS = {'ranked': RANKED_ORDER, 'tournament': TOURNAMENT_ORDER}
+
+DEFAULT_DEPTH = 4
+DEFAULT_BEAM = 6
+DEFAULT_NODE_BUDGET = 20000
+DEFAULT_DEADLINE_MS = 500
+
+
+class SearchAborted(Exception):
+    """Raised inside the search when the node budget or deadline runs out."""
+
+
+def to_mask(hero_ids):
+    mask = 0
+    for hero_id in hero_ids:
+        mask |= 1 << (hero_id - 1)
+    return mask
+
+
+def from_mask(mask):
+    hero_ids = []
+    while mask:
+        low = mask & -mask
+        hero_ids.append(low.bit_length())
+        mask ^= low
+    return hero_ids
+
+
+def remaining_steps(team_pick, team_ban, enemy_pick, enemy_ban, mode='ranked', first_pick='team'):
+    """
+    Returns the steps of the draft order that are still open, as
+    ('team' | 'enemy', 'pick' | 'ban') tuples. The n-th step of a side and
+    action counts as done when that side already has more than n of them,
+    and every step before a done step is over too, so picks without
+    recorded bans mean the ban phase has passed.
+    """
+    done = {
+        ('team', 'pick'): len(team_pick), ('team', 'ban'): len(team_ban),
+        ('enemy', 'pick'): len(enemy_pick), ('enemy', 'ban'): len(enemy_ban),
+    }
+    sides = {'first': first_pick, 'second': 'enemy' if first_pick == 'team' else 'team'}
+    seen = dict.fromkeys(done, 0)
+    steps = []
+    for side, action in DRAFT_ORDERS[mode]:
+        key = (sides[side], action)
+        steps.append((key, seen[key] >= done[key]))
+        seen[key] += 1
+    last_done = max((i for i, (_, is_open) in enumerate(steps) if not is_open), default=-1)
+    return [key for i, (key, is_open) in enumerate(steps) if is_open and i > last_done]
+
+
+class DraftSearch:
+    """
+    Minimax over the remaining draft steps. The team maximizes and the enemy
+    minimizes matrix_scorer.composition_score; bans remove the hero the
+    other side would most like to pick.
+    """
+
+    def __init__(self, matrices, beam=DEFAULT_BEAM, node_budget=DEFAULT_NODE_BUDGET, deadline_ms=DEFAULT_DEADLINE_MS):
+        self.matrices = matrices
+        self.beam = beam
+        self.node_budget = node_budget
+        self.deadline_ms = deadline_ms
+        self.available = np.zeros(matrix_scorer.N_HEROES, dtype=bool)
+        self.available[matrices['hero_ids'] - 1] = True
+        self.table = {}
+        self.nodes = 0
+        self.table_hits = 0
+        self.deadline = None
+        # The root move being scored and the step it is played at (-1: already on the board)
+        self.root_bit = 0
+        self.root_step = -1
+
+    def _tick(self):
+        self.nodes += 1
+        if self.node_budget and self.nodes > self.node_budget:
+            raise SearchAborted()
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            raise SearchAborted()
+
+    def _beam(self, side_mask, other_mask, used_mask):
+        """The beam best picks for the side owning side_mask."""
+        scores = matrix_scorer.score_all(self.matrices, from_mask(side_mask), from_mask(other_mask))
+        free = self.available.copy()
+        free[np.array(from_mask(used_mask), dtype=np.intp) - 1] = False
+        candidates = np.flatnonzero(free)
+        if len(candidates) == 0:
+            return []
+        order = np.argsort(-scores[candidates], kind='stable')[:self.beam]
+        return (candidates[order] + 1).tolist()
+
+    def _value(self, team_mask, enemy_mask, ban_mask, steps, step, depth):
+        # Until its step comes up, the root move is reserved for us and counts in leaf scores
+        pending = self.root_bit if step <= self.root_step else 0
+        if depth == 0 or step == len(steps):
+            return matrix_scorer.composition_score(self.matrices, from_mask(team_mask | pending),
+                                                   from_mask(enemy_mask))
+        if step == self.root_step:
+            return self._value(team_mask | self.root_bit, enemy_mask, ban_mask, steps, step + 1, depth)
+        key = (team_mask, enemy_mask, ban_mask, step, pending)
+        entry = self.table.get(key)
+        if entry is not None and entry[0] >= depth:
+            self.table_hits += 1
+            return entry[1]
+        self._tick()
+        side, action = steps[step]
+        used = team_mask | enemy_mask | ban_mask | pending
+        if action == 'pick':
+            own, other = (team_mask, enemy_mask) if side == 'team' else (enemy_mask, team_mask)
+        else:
+            # A ban takes away the hero the other side wants most
+            own, other = (enemy_mask, team_mask) if side == 'team' else (team_mask, enemy_mask)
+        moves = self._beam(own, other, used)
+        if moves and depth == 1:
+            # Children are leaves: evaluate them all at once from the parent's score
+            value = matrix_scorer.composition_score(self.matrices, from_mask(team_mask | pending),
+                                                    from_mask(enemy_mask))
+            if action == 'pick':
+                # Only enemy picks can come before the root move, so the pending hero is on the other side
+                deltas = matrix_scorer.pick_deltas(self.matrices, from_mask(own), from_mask(other | pending), moves)
+                value = value + float(deltas.max()) if side == 'team' else value - float(deltas.max())
+        elif not moves:
+            value = self._value(team_mask, enemy_mask, ban_mask, steps, step + 1, depth - 1)
+        else:
+            values = []
+            for hero_id in moves:
+                bit = 1 << (hero_id - 1)
+                if action == 'ban':
+                    values.append(self._value(team_mask, enemy_mask, ban_mask | bit, steps, step + 1, depth - 1))
+                elif side == 'team':
+                    values.append(self._value(team_mask | bit, enemy_mask, ban_mask, steps, step + 1, depth - 1))
+                else:
+                    values.append(self._value(team_mask, enemy_mask | bit, ban_mask, steps, step + 1, depth - 1))
+            value = max(values) if side == 'team' else min(values)
+        self.table[key] = (depth, value)
+        return value
+
+    def _root_value(self, hero_id, team_mask, enemy_mask, ban_mask, steps, depth):
+        self.root_bit = 1 << (hero_id - 1)
+        if self.root_step < 0:
+            team_mask |= self.root_bit
+        return self._value(team_mask, enemy_mask, ban_mask, steps, 0, depth)
+
+    def search(self, root_moves, team_pick, team_ban, enemy_pick, enemy_ban, steps, max_depth=DEFAULT_DEPTH,
+               root_step=-1):
+        """
+        Scores each root move (a candidate for our next pick) by iterative
+        deepening up to max_depth further steps. The root move is played at
+        steps[root_step], after any enemy steps before it (-1: before all
+        steps). Returns (move, value) pairs from the deepest fully completed
+        iteration, best first, and the depth reached.
+        """
+        self.deadline = time.perf_counter() + self.deadline_ms / 1000 if self.deadline_ms else None
+        self.root_step = root_step
+        team_mask = to_mask(team_pick)
+        enemy_mask = to_mask(enemy_pick)
+        ban_mask = to_mask(team_ban + enemy_ban)
+        open_steps = len(steps) - (root_step >= 0)
+        best = [(hero_id, 0.0) for hero_id in root_moves]
+        reached = 0
+        for depth in range(0, max_depth + 1):
+            try:
+                values = [(hero_id, self._root_value(hero_id, team_mask, enemy_mask, ban_mask, steps, depth))
+                          for hero_id in root_moves]
+            except SearchAborted:
+                break
+            best = sorted(values, key=lambda item: item[1], reverse=True)
+            reached = depth
+            if depth >= open_steps:
+                break
+        return best, reached
+
+
+def search_draft(team_pick, team_ban, enemy_pick, enemy_ban, n_suggest, engine='forest', model_data=None,
+                 matrices=None, depth=DEFAULT_DEPTH, beam=DEFAULT_BEAM, node_budget=DEFAULT_NODE_BUDGET,
+                 deadline_ms=DEFAULT_DEADLINE_MS, mode='ranked', first_pick='team'):
+    """
+    Recommends our next pick by looking depth steps ahead in the draft.
+    Root candidates come from suggest_heroes with the chosen engine; the rest
+    of the draft is played out with the matrix scorer. Returns the ranked
+    hero IDs and a dict of search statistics.
+    """
+    if matrices is None:
+        matrices = matrix_scorer.load_matrices()
+    if engine == 'matrix' and model_data is None:
+        model_data = matrices
+    root_moves = suggest_heroes(team_pick, team_ban, enemy_pick, enemy_ban, max(beam, n_suggest),
+                                model_data=model_data, engine=engine)
+    steps = remaining_steps(team_pick, team_ban, enemy_pick, enemy_ban, mode=mode, first_pick=first_pick)
+    # The root move fills our next pick slot, at its place in the draft order
+    root_step = steps.index(('team', 'pick')) if ('team', 'pick') in steps else -1
+    searcher = DraftSearch(matrices, beam=beam, node_budget=node_budget, deadline_ms=deadline_ms)
+    start = time.perf_counter()
+    with PROFILER.phase('search'):
+        ranked, reached = searcher.search(root_moves, team_pick, team_ban, enemy_pick, enemy_ban, steps,
+                                          max_depth=depth, root_step=root_step)
+    stats = {
+        'depth': reached,
+        'nodes': searcher.nodes,
+        'table_entries': len(searcher.table),
+        'table_hits': searcher.table_hits,
+        'elapsed_ms': round((time.perf_counter() - start) * 1000, 3),
+        'remaining_steps': len(steps) - (root_step >= 0),
+    }
+    return [hero_id for hero_id, _ in ranked[:n_suggest]], stats
@@ -0,0 +1,205 @@
+"""
+Evaluation and model selection for the MLBB Hero Suggestor.
+
+Measures how well the RandomForest ranks the held-out pick of each sample
+(top-k accuracy) under k-fold cross-validation or a single held-out split,
+for every configuration of a hyperparameter grid. The (configuration, fold)
+fits run in parallel across processes; fold splits and forest seeds come
+from one base seed, so reruns give identical accuracies. Next to accuracy
+the report gives training time, single-draft inference latency of the
+compact forest and the size of both model files, and it can be written as
+JSON to compare data refreshes.
+"""
+import itertools
+import json
+import os
+import pickle
+import statistics
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import KFold, train_test_split
+
+from compact_model import CompactForest, export_compact_model
+from main import build_feature_index, encode_teams, rank_data_dir
+from train import (FEATURE_HEROES, load_data, prepare_training_data, prepare_training_data_from_json,
+                   prepare_training_data_from_sim, sim_path)
+
+# Swept by default: the forest trained by --train is n_estimators=100, max_depth=None
+DEFAULT_GRID = {
+    'n_estimators': [50, 100, 200],
+    'max_depth': [None, 16],
+    'min_samples_leaf': [1, 2],
+}
+DEFAULT_K = (1, 5, 10)
+# Single-draft predictions timed per fold
+LATENCY_SAMPLES = 50
+# Set by evaluate_fold from --seed and the worker pool, so a grid cannot sweep them
+FIXED_PARAMS = {'random_state': '--seed', 'n_jobs': '--workers'}
+
+
+def validate_grid(grid):
+    """
+    Checks a {param: [values]} grid against the RandomForestClassifier
+    parameters. Returns an error message, or None if the grid is valid.
+    """
+    if not isinstance(grid, dict) or not grid:
+        return 'the grid must be a non-empty JSON object of {param: [values]}'
+    known = RandomForestClassifier().get_params()
+    unknown = sorted(name for name in grid if name not in known)
+    if unknown:
+        return f'unknown RandomForestClassifier parameter(s): {", ".join(unknown)}'
+    fixed = sorted(name for name in grid if name in FIXED_PARAMS)
+    if fixed:
+        return '; '.join(f'{name} is set by {FIXED_PARAMS[name]}, not by the grid' for name in fixed)
+    empty = sorted(name for name, values in grid.items() if not isinstance(values, list) or not values)
+    if empty:
+        return f'every parameter needs a non-empty list of values: {", ".join(empty)}'
+    return None
+
+
+def expand_grid(grid):
+    """Every combination of a {param: [values]} grid, as a list of dicts."""
+    names = sorted(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def load_samples(source='csv', rank=''):
+    """Returns (teams, labels, sample_weight) from a tier's CSV, JSON snapshots or simulated drafts."""
+    if source == 'json':
+        return prepare_training_data_from_json(rank_data_dir(rank))
+    if source == 'sim':
+        return prepare_training_data_from_sim(sim_path(rank))
+    teams, labels = prepare_training_data(load_data(rank))
+    return teams, labels, None
+
+
+def split_folds(n_samples, folds, seed, test_size=0.2):
+    """(train_idx, test_idx) pairs: k shuffled folds, or one held-out split if folds < 2."""
+    if folds < 2:
+        train_idx, test_idx = train_test_split(np.arange(n_samples), test_size=test_size, random_state=seed)
+        return [(train_idx, test_idx)]
+    return list(KFold(n_splits=folds, shuffle=True, random_state=seed).split(np.arange(n_samples)))
+
+
+def top_k_hits(proba, classes, teams, labels, ks):
+    """
+    Fraction of rows whose label is among the k best-scored heroes, for each
+    k in ks. The row's own team heroes are never counted as suggestions, as
+    in suggest_heroes; labels the forest never saw count as misses.
+    """
+    scores = proba.copy()
+    class_index = {hero: i for i, hero in enumerate(classes)}
+    rows = np.repeat(np.arange(len(teams)), teams.shape[1])
+    cols = np.array([class_index.get(hero, -1) for hero in teams.ravel()], dtype=np.intp)
+    scores[rows[cols >= 0], cols[cols >= 0]] = -np.inf
+    label_cols = np.array([class_index.get(label, -1) for label in labels], dtype=np.intp)
+    known = label_cols >= 0
+    label_scores = np.where(known, scores[np.arange(len(labels)), label_cols], -np.inf)
+    # Ties are ranked against the label, like a stable sort that puts it last
+    rank = (scores >= label_scores[:, None]).sum(axis=1) - 1
+    return {k: float(np.mean(known & (rank < k))) for k in ks}
+
+
+def evaluate_fold(params, teams, labels, sample_weight, train_idx, test_idx, ks, seed):
+    """Fits one configuration on one fold and measures it."""
+    feature_index = build_feature_index(FEATURE_HEROES)
+    X = encode_teams(teams, feature_index, len(FEATURE_HEROES))
+    clf = RandomForestClassifier(random_state=seed, n_jobs=1, **params)
+    start = time.perf_counter()
+    clf.fit(X[train_idx], labels[train_idx],
+            sample_weight=None if sample_weight is None else sample_weight[train_idx])
+    train_s = time.perf_counter() - start
+
+    hits = top_k_hits(clf.predict_proba(X[test_idx]), clf.classes_, teams[test_idx], labels[test_idx], ks)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        compact_path = os.path.join(tmp, 'model.forest')
+        export_compact_model(clf, FEATURE_HEROES, compact_path)
+        compact_bytes = os.path.getsize(compact_path)
+        forest = CompactForest(compact_path)
+        latencies = []
+        for row in X[test_idx[:LATENCY_SAMPLES]]:
+            start = time.perf_counter()
+            forest.predict_proba(row[None, :])
+            latencies.append((time.perf_counter() - start) * 1000)
+        del forest
+    return {
+        'top_k': hits,
+        'train_s': train_s,
+        'latency_ms': statistics.median(latencies),
+        'pickle_bytes': len(pickle.dumps(clf, protocol=pickle.HIGHEST_PROTOCOL)),
+        'compact_bytes': compact_bytes,
+    }
+
+
+def summarize(params, fold_results, ks):
+    def mean(values):
+        return round(statistics.fmean(values), 6)
+
+    def std(values):
+        return round(statistics.pstdev(values), 6)
+
+    summary = {'params': params}
+    for k in ks:
+        values = [result['top_k'][k] for result in fold_results]
+        summary[f'top{k}'] = mean(values)
+        summary[f'top{k}_std'] = std(values)
+    summary['train_s'] = mean([result['train_s'] for result in fold_results])
+    summary['latency_ms'] = mean([result['latency_ms'] for result in fold_results])
+    summary['pickle_bytes'] = int(statistics.fmean(result['pickle_bytes'] for result in fold_results))
+    summary['compact_bytes'] = int(statistics.fmean(result['compact_bytes'] for result in fold_results))
+    return summary
+
+
+def run_evaluation(source='csv', folds=5, ks=DEFAULT_K, grid=None, workers=1, seed=42, report_path='', rank=''):
+    """
+    Cross-validates every configuration of grid (DEFAULT_GRID if None) and
+    prints one line per configuration, best top-k first (for the smallest k
+    in ks). Returns the report dict, also written to report_path if given.
+    """
+    ks = tuple(sorted(ks))
+    configs = expand_grid(grid or DEFAULT_GRID)
+    teams, labels, sample_weight = load_samples(source, rank)
+    splits = split_folds(len(labels), folds, seed)
+    start = time.perf_counter()
+    jobs = [(params, train_idx, test_idx) for params in configs for train_idx, test_idx in splits]
+    if workers <= 1:
+        results = [evaluate_fold(params, teams, labels, sample_weight, train_idx, test_idx, ks, seed)
+                   for params, train_idx, test_idx in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(evaluate_fold, params, teams, labels, sample_weight, train_idx, test_idx, ks, seed)
+                       for params, train_idx, test_idx in jobs]
+            results = [future.result() for future in futures]
+    elapsed = time.perf_counter() - start
+
+    summaries = [summarize(params, results[i * len(splits):(i + 1) * len(splits)], ks)
+                 for i, params in enumerate(configs)]
+    summaries.sort(key=lambda summary: (-summary[f'top{ks[0]}'], -summary[f'top{ks[-1]}'], summary['latency_ms']))
+    report = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'source': source,
+        'rank': rank,
+        'samples': int(len(labels)),
+        'folds': len(splits),
+        'seed': seed,
+        'k': list(ks),
+        'elapsed_s': round(elapsed, 3),
+        'results': summaries,
+        'best': summaries[0]['params'],
+    }
+
+    print(f'Evaluated {len(configs)} configuration(s) x {len(splits)} fold(s) on {len(labels)} {source} samples '
+          f'in {elapsed:.1f}s ({workers} worker(s))')
+    for summary in summaries:
+        accuracy = '  '.join(f"top{k} {summary[f'top{k}']:.3f}" for k in ks)
+        print(f"{accuracy}  train {summary['train_s']:.2f}s  latency {summary['latency_ms']:.2f}ms  "
+              f"compact {summary['compact_bytes'] / 1e6:.1f}MB  {json.dumps(summary['params'])}")
+    if report_path:
+        with open(report_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return report
@@ -1,19 +1,34 @@
+import time
+_import_start = time.perf_counter()
 import argparse
+import json
 import os
-import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import MultiLabelBinarizer
-import joblib
+import matrix_scorer
+from compact_model import COMPACT_MODEL_PATH, CompactForest
+from profiling import PROFILER
+_import_ms = (time.perf_counter() - _import_start) * 1000
+
+# Inference only needs NumPy. pandas, scikit-learn and joblib are imported by
+# train.py (for --train) or when falling back to the pickled model.
 
-CSV_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), '..', 'data', 'csv', 'hero_data.csv')
 MODEL_PATH = os.path.join(os.path.dirname(__file__), 'hero_suggestor_model.pkl')
 
 MAX_TEAM = 4
 MAX_BAN = 5
 MAX_ENEMY = 5
 
+# Draft state fields, as used by the CLI arguments and JSON requests
+DRAFT_FIELDS = ('team_pick', 'team_ban', 'enemy_pick', 'enemy_ban')
+
+# Scoring engines: the trained RandomForest or the synergy/counter matrices
+ENGINES = ('forest', 'matrix')
+
+# Rank tiers the fetcher can filter on (RankType values in fetch_data.py).
+# Each tier's snapshots live in data/rank_<tier>/ and its models are stored
+# next to the default ones with a .rank<tier> suffix. '' is the default data.
+RANKS = {'101': 'All', '5': 'Epic', '6': 'Legend', '7': 'Mythic', '8': 'Honor', '9': 'Glory'}
+
 # Hero ID to Name mapping
 HERO_ID_TO_NAME = {
     1: 'Miya', 2: 'Balmond', 3: 'Saber', 4: 'Alice', 5: 'Nana', 6: 'Tigreal', 7: 'Alucard', 8: 'Karina', 9: 'Akai', 10: 'Franco',
@@ -36,93 +51,347 @@ HERO_NAME_TO_ID = {v.lower().replace(' ', '').replace("'", ""): k for k, v in HE
 def parse_args():
     parser = argparse.ArgumentParser(description='MLBB Hero Suggestor')
     parser.add_argument('--train', action='store_true', help='Train and save the model')
+    parser.add_argument('--train_source', choices=['csv', 'json', 'sim'], default='csv', help='Training data for --train: hero_data.csv top-5 lists, every entry of the JSON snapshots or --simulate self-play drafts')
+    parser.add_argument('--sim_limit', type=int, default=0, help='Use at most this many simulated drafts with --train_source sim (0 = all)')
+    parser.add_argument('--full_retrain', action='store_true', help='Make --train rebuild everything instead of only what changed since the last run')
+    parser.add_argument('--evaluate', action='store_true', help='Cross-validate the model over a hyperparameter grid and report top-k accuracy')
+    parser.add_argument('--folds', type=int, default=5, help='Cross-validation folds for --evaluate (1 = single 80/20 held-out split)')
+    parser.add_argument('--top_k', type=str, default='1,5,10', help='Comma-separated k values for --evaluate top-k accuracy')
+    parser.add_argument('--grid', type=str, default='', help='Hyperparameter grid for --evaluate: JSON object or JSON file of {param: [values]}')
+    parser.add_argument('--seed', type=int, default=42, help='Seed for --evaluate fold splits and forests and for --simulate (default: 42)')
+    parser.add_argument('--report', type=str, default='', help='Write the --evaluate report to this JSON file')
+    parser.add_argument('--rank', type=str, default='', help=f'Rank tier to train or suggest for ({", ".join(f"{k}={v}" for k, v in RANKS.items())}); --train also accepts a comma-separated list or "all"')
     parser.add_argument('--team_pick', type=str, help='Comma-separated hero IDs picked by your team (min 1, max 4)')
     parser.add_argument('--team_ban', type=str, default='', help='Comma-separated hero IDs banned by your team (max 5)')
     parser.add_argument('--enemy_pick', type=str, help='Comma-separated hero IDs picked by enemy team (min 1, max 5)')
     parser.add_argument('--enemy_ban', type=str, default='', help='Comma-separated hero IDs banned by enemy team (max 5)')
     parser.add_argument('--suggest', type=int, default=5, help='Number of hero suggestions to output')
+    parser.add_argument('--suggest_bans', action='store_true', help='Recommend heroes to ban instead of picks; --team_pick and --enemy_pick may be empty')
+    parser.add_argument('--explain', action='store_true', help='Show the score breakdown of each suggestion (--engine matrix): synergy per ally, counter and threat per enemy pick')
+    parser.add_argument('--json', action='store_true', help='Print the draft and suggestions as JSON instead of a table')
+    parser.add_argument('--engine', choices=ENGINES, default='forest', help='Scoring engine: forest (RandomForest) or matrix (synergy/counter matrices)')
+    parser.add_argument('--game_length', type=str, default='', help=f'Score for a game-length profile with --engine matrix: {", ".join(matrix_scorer.GAME_LENGTH_PROFILES)} or {len(matrix_scorer.DURATION_BUCKETS)} comma-separated duration-bucket weights')
+    parser.add_argument('--lookahead', type=int, default=0, help='Search this many draft steps ahead before recommending (0 = off)')
+    parser.add_argument('--beam', type=int, default=6, help='Heroes considered per step in --lookahead search (default: 6)')
+    parser.add_argument('--node_budget', type=int, default=20000, help='Maximum nodes expanded by --lookahead search (0 = unlimited)')
+    parser.add_argument('--deadline_ms', type=int, default=500, help='Wall-clock limit for --lookahead search in ms (0 = unlimited)')
+    parser.add_argument('--draft_mode', choices=['ranked', 'tournament'], default='ranked', help='Pick/ban order used by --lookahead and --simulate')
+    parser.add_argument('--first_pick', choices=['team', 'enemy'], default='team', help='Which side has first pick (for --lookahead)')
+    parser.add_argument('--cache_file', type=str, default='', help='Persist cached suggestions for repeated draft states in this JSON file')
+    parser.add_argument('--cache_size', type=int, default=4096, help='Maximum number of cached draft states (default: 4096)')
+    parser.add_argument('--batch', type=str, default='', help='Score every draft in this JSONL or CSV file')
+    parser.add_argument('--output', type=str, default='', help='Output JSONL file for --batch (default: stdout)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Worker processes for --batch, --evaluate and --simulate (default: CPU count)')
+    parser.add_argument('--chunk_size', type=int, default=256, help='Drafts scored per model call in --batch (default: 256)')
+    parser.add_argument('--win_prob', action='store_true', help='Estimate the win probability of two complete 5-hero lineups (--team_pick vs --enemy_pick), or of every lineup in the --batch file')
+    parser.add_argument('--simulate', type=int, default=0, help='Play this many self-play drafts with the matrix scorer and write them for --train_source sim')
+    parser.add_argument('--sim_noise', type=float, default=0.02, help='Temperature of the Gumbel noise on --simulate picks and bans (0 = greedy, default: 0.02)')
+    parser.add_argument('--session', action='store_true', help='Keep the model and draft in memory and read picks/bans as commands or JSON lines from stdin')
+    parser.add_argument('--serve', action='store_true', help='Run a suggestion server that keeps the model loaded')
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='Host for --serve (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8765, help='Port for --serve (default: 8765)')
+    parser.add_argument('--socket', type=str, default='', help='Serve on this Unix socket path instead of a TCP port')
+    parser.add_argument('--profile', nargs='?', const='-', default='', help='Print per-phase wall time and allocations after the suggestion, or write them as JSON to the given file')
+    parser.add_argument('--profile_log', type=str, default='', help='Append per-request (--serve) or per-chunk (--batch) phase records to this JSONL file')
+    parser.add_argument('--max_models', type=int, default=2, help='Models (engine and rank pairs) --serve keeps loaded at once (default: 2)')
     return parser.parse_args()
 
-def load_data():
-    df = pd.read_csv(CSV_PATH)
-    return df
-
-def prepare_training_data(df):
-    # For each row, create training samples: (team, enemy, bans) -> main_heroid
-    X, y = [], []
-    for _, row in df.iterrows():
-        # Use best1..best5 as positive samples for main_heroid synergy
-        bests = [row[f'best{i+1}'] for i in range(5) if not pd.isna(row[f'best{i+1}'])]
-        team = [row['main_heroid']]
-        for best in bests:
-            X.append(team)
-            y.append(best)
-        # Use counters as negative samples (optional, for more robust model)
-        counters = [row[f'counter{i+1}'] for i in range(5) if not pd.isna(row[f'counter{i+1}'])]
-        for counter in counters:
-            X.append(team)
-            y.append(counter)
-    return X, y
-
-def train_and_save_model():
-    df = load_data()
-    X, y = prepare_training_data(df)
-    mlb = MultiLabelBinarizer(classes=range(1, 129))
-    X_bin = mlb.fit_transform(X)
-    clf = RandomForestClassifier(n_estimators=100, random_state=42)
-    clf.fit(X_bin, y)
-    joblib.dump({'model': clf, 'mlb': mlb}, MODEL_PATH)
-    print('Model trained and saved.')
-
-def load_model():
-    if not os.path.exists(MODEL_PATH):
-        print('Model not found. Please run with --train first to train the model.')
+def load_model(rank=''):
+    path = forest_model_path(rank)
+    if not os.path.exists(path):
+        rank_arg = f' --rank {rank}' if rank else ''
+        print(f'Model not found. Please run with --train{rank_arg} first to train the model.')
         exit(1)
-    return joblib.load(MODEL_PATH)
+    return read_model(path)
+
+def rank_path(path, rank=''):
+    """
+    Returns the per-tier variant of an artifact path, e.g.
+    hero_suggestor_model.forest -> hero_suggestor_model.rank9.forest.
+    """
+    if not rank:
+        return path
+    base, ext = os.path.splitext(path)
+    return f'{base}.rank{rank}{ext}'
+
+def rank_data_dir(rank=''):
+    """
+    Returns the snapshot directory of a rank tier.
+    """
+    if not rank:
+        return matrix_scorer.DATA_DIR
+    return os.path.join(matrix_scorer.DATA_DIR, f'rank_{rank}')
+
+def forest_model_path(rank=''):
+    """
+    Prefers the memory-mappable compact model; falls back to the pickle.
+    """
+    compact_path = rank_path(COMPACT_MODEL_PATH, rank)
+    return compact_path if os.path.exists(compact_path) else rank_path(MODEL_PATH, rank)
+
+def engine_path(engine, rank=''):
+    """
+    Returns the file the engine's model is loaded from.
+    """
+    return rank_path(matrix_scorer.MATRIX_PATH, rank) if engine == 'matrix' else forest_model_path(rank)
+
+def load_engine(engine, rank=''):
+    """
+    Loads the data a scoring engine needs (model or matrices).
+    """
+    if engine == 'matrix':
+        path = rank_path(matrix_scorer.MATRIX_PATH, rank)
+        if not os.path.exists(path) and not os.path.isdir(rank_data_dir(rank)):
+            print(f'No snapshot data for rank {rank} in {os.path.normpath(rank_data_dir(rank))}.')
+            exit(1)
+        return matrix_scorer.load_matrices(path, rank_data_dir(rank))
+    return load_model(rank)
+
+def read_model(path):
+    if path.endswith('.forest'):
+        forest = CompactForest(path)
+        model_data = {'model': forest, 'feature_heroes': forest.feature_heroes}
+    else:
+        import joblib
+        model_data = joblib.load(path)
+        if 'mlb' in model_data:
+            # Pickles from older versions store the fitted MultiLabelBinarizer
+            model_data['feature_heroes'] = np.asarray(model_data.pop('mlb').classes_)
+    model_data['feature_index'] = build_feature_index(model_data['feature_heroes'])
+    model_data['class_index'] = build_class_index(model_data['model'].classes_)
+    return model_data
 
-def suggest_heroes(team_pick, team_ban, enemy_pick, enemy_ban, n_suggest):
-    model_data = load_model()
+def build_feature_index(feature_heroes):
+    """
+    Returns an array mapping hero ID -> input column of the model (-1 if unused).
+    """
+    feature_index = np.full(max(HERO_ID_TO_NAME) + 1, -1, dtype=np.intp)
+    feature_index[np.asarray(feature_heroes, dtype=np.intp)] = np.arange(len(feature_heroes))
+    return feature_index
+
+def encode_teams(teams, feature_index, n_features):
+    """
+    One-hot encodes lists of hero IDs (or a 2D array of them, one team per
+    row) into a (len(teams), n_features) 0/1 matrix with a direct index
+    lookup. Heroes without an input column are ignored.
+    """
+    if isinstance(teams, np.ndarray):
+        rows = np.repeat(np.arange(len(teams)), teams.shape[1])
+        heroes = teams.ravel().astype(np.intp)
+    else:
+        rows = np.repeat(np.arange(len(teams)), [len(team) for team in teams])
+        heroes = np.fromiter((hero for team in teams for hero in team), dtype=np.intp, count=len(rows))
+    cols = feature_index[heroes]
+    X = np.zeros((len(teams), n_features), dtype=np.uint8)
+    X[rows[cols >= 0], cols[cols >= 0]] = 1
+    return X
+
+def build_class_index(classes):
+    """
+    Returns an array mapping hero ID -> column of predict_proba (-1 if unknown).
+    """
+    class_index = np.full(max(HERO_ID_TO_NAME) + 1, -1, dtype=np.intp)
+    class_index[np.asarray(classes, dtype=np.intp)] = np.arange(len(classes))
+    return class_index
+
+def score_candidates(model_data, team_pick, candidates):
+    """
+    Scores every candidate with a single predict_proba call.
+    Row i of the input matrix is the team picks plus candidates[i].
+    """
     clf = model_data['model']
-    mlb = model_data['mlb']
-    all_heroes = set(clf.classes_)  # Only use heroes the model knows
-    excluded = set(team_pick + team_ban + enemy_pick + enemy_ban)
-    candidates = list(all_heroes - excluded)
+    X = encode_teams([team_pick + [hero] for hero in candidates], model_data['feature_index'],
+                     len(model_data['feature_heroes']))
+    proba = clf.predict_proba(X)
+    cols = model_data['class_index'][candidates]
+    return proba[np.arange(len(candidates)), cols]
+
+def top_k(candidates, scores, k):
+    """
+    Returns the k best candidates by score, highest first.
+    Uses partial selection; ties keep the candidates' original order.
+    """
+    k = min(k, len(candidates))
+    if k <= 0:
+        return []
+    kth = -np.partition(-scores, k - 1)[k - 1]
+    above = np.flatnonzero(scores > kth)
+    ties = np.flatnonzero(scores == kth)[:k - len(above)]
+    idx = np.concatenate([above, ties])
+    idx = idx[np.lexsort((idx, -scores[idx]))]
+    return candidates[idx].tolist()
+
+def suggest_heroes(team_pick, team_ban, enemy_pick, enemy_ban, n_suggest, model_data=None, engine='forest', rank='',
+                   explain=False):
+    """
+    Returns the n_suggest best hero IDs for the draft. With explain (matrix
+    engine only), returns (suggestions, explanations): the score breakdown
+    of each suggestion, taken from the same scoring pass.
+    """
+    if explain and engine != 'matrix':
+        raise ValueError('score explanations need the matrix engine')
+    if model_data is None:
+        with PROFILER.phase('load_model'):
+            model_data = load_engine(engine, rank)
+    with PROFILER.phase('candidates'):
+        if engine == 'matrix':
+            all_heroes = set(model_data['hero_ids'].tolist())  # Heroes with snapshot data
+        else:
+            all_heroes = set(model_data['model'].classes_)  # Only use heroes the model knows
+        excluded = set(team_pick + team_ban + enemy_pick + enemy_ban)
+        candidates = np.array(sorted(all_heroes - excluded), dtype=np.intp)
     if len(candidates) < n_suggest:
         print(f"Warning: Only {len(candidates)} heroes available for suggestion (some heroes not in model/classes).")
-    scores = []
-    for hero in candidates:
-        input_vec = mlb.transform([team_pick + [hero]])[0]
-        prob = clf.predict_proba([input_vec])[0]
-        hero_idx = clf.classes_.tolist().index(hero)
-        score = prob[hero_idx]
-        scores.append((hero, score))
-    scores.sort(key=lambda x: x[1], reverse=True)
-    return [h for h, _ in scores[:n_suggest]]
+    if len(candidates) == 0:
+        return ([], []) if explain else []
+    with PROFILER.phase('score'):
+        if explain:
+            parts = matrix_scorer.score_breakdown(model_data, team_pick, enemy_pick, candidates)
+            scores = parts['score']
+        elif engine == 'matrix':
+            scores = matrix_scorer.score_candidates(model_data, team_pick, enemy_pick, candidates)
+        else:
+            scores = score_candidates(model_data, team_pick, candidates)
+    with PROFILER.phase('top_k'):
+        suggestions = top_k(candidates, scores, n_suggest)
+    if not explain:
+        return suggestions
+    columns = np.searchsorted(candidates, suggestions)
+    return suggestions, matrix_scorer.explain_columns(parts, team_pick, enemy_pick, columns)
 
-def parse_hero_arg(arg):
+def suggest_bans(team_pick, team_ban, enemy_pick, enemy_ban, n_suggest, model_data=None, engine='forest', rank=''):
     """
-    Accepts a comma-separated string of hero names or IDs.
-    Returns a list of hero IDs.
+    Ranks heroes to ban by how much banning them lowers the enemy's best
+    remaining picks. Every available hero is scored once, in one pass, as
+    a pick for enemy_pick against team_pick. The enemy's best responses are
+    its top r scores, r being its open pick slots; banning one of them
+    leaves the (r + 1)-th best in its place, so its impact is the score gap
+    to that hero. Other heroes have impact 0 and follow by enemy score.
+    The forest scores a pick from the enemy's own picks, so before the
+    enemy's first pick (the ranked ban phase) the matrix engine is used.
+    Returns (hero, impact) pairs, highest impact first.
+    """
+    if engine != 'matrix' and not enemy_pick:
+        engine, model_data = 'matrix', None
+    if model_data is None:
+        with PROFILER.phase('load_model'):
+            model_data = load_engine(engine, rank)
+    with PROFILER.phase('candidates'):
+        if engine == 'matrix':
+            all_heroes = set(model_data['hero_ids'].tolist())
+        else:
+            all_heroes = set(model_data['model'].classes_)
+        excluded = set(team_pick + team_ban + enemy_pick + enemy_ban)
+        candidates = np.array(sorted(all_heroes - excluded), dtype=np.intp)
+    if len(candidates) == 0:
+        return []
+    with PROFILER.phase('score'):
+        if engine == 'matrix':
+            scores = matrix_scorer.score_candidates(model_data, enemy_pick, team_pick, candidates)
+        else:
+            scores = score_candidates(model_data, enemy_pick, candidates)
+    with PROFILER.phase('top_k'):
+        return rank_bans(candidates, scores, MAX_ENEMY - len(enemy_pick), n_suggest)
+
+def rank_bans(candidates, scores, open_slots, n_suggest):
+    """
+    The n_suggest best bans as (hero, impact) pairs, given the enemy's
+    score for each candidate (sorted by hero ID) and its open pick slots.
+    """
+    responses = max(open_slots, 1)
+    replacement = -np.partition(-scores, responses)[responses] if len(scores) > responses else scores.min()
+    impacts = np.maximum(scores - replacement, 0)
+    bans = top_k(candidates, scores, n_suggest)
+    return [(hero, float(impacts[np.searchsorted(candidates, hero)])) for hero in bans]
+
+def suggest_heroes_batch(drafts, model_data, engine='forest'):
+    """
+    Scores many drafts with one model call.
+    drafts is a list of (team_pick, team_ban, enemy_pick, enemy_ban, n_suggest)
+    tuples; returns their suggestion lists in the same order.
+    """
+    with PROFILER.phase('candidates'):
+        if engine == 'matrix':
+            all_heroes = set(model_data['hero_ids'].tolist())
+        else:
+            all_heroes = set(model_data['model'].classes_)
+        candidate_lists = [
+            np.array(sorted(all_heroes - set(team_pick + team_ban + enemy_pick + enemy_ban)), dtype=np.intp)
+            for team_pick, team_ban, enemy_pick, enemy_ban, _ in drafts
+        ]
+    with PROFILER.phase('score'):
+        if engine == 'matrix':
+            all_scores = matrix_scorer.score_all_batch(model_data, [d[0] for d in drafts], [d[2] for d in drafts])
+            score_lists = [row[candidates - 1] for row, candidates in zip(all_scores, candidate_lists)]
+        else:
+            # One input row per (draft, candidate) pair, scored in a single predict_proba call
+            rows = [draft[0] + [hero] for draft, candidates in zip(drafts, candidate_lists) for hero in candidates]
+            flat_candidates = np.concatenate(candidate_lists) if candidate_lists else np.zeros(0, dtype=np.intp)
+            flat_scores = np.zeros(0)
+            if rows:
+                X = encode_teams(rows, model_data['feature_index'], len(model_data['feature_heroes']))
+                proba = model_data['model'].predict_proba(X)
+                flat_scores = proba[np.arange(len(rows)), model_data['class_index'][flat_candidates]]
+            offsets = np.cumsum([len(c) for c in candidate_lists])[:-1]
+            score_lists = np.split(flat_scores, offsets) if candidate_lists else []
+    with PROFILER.phase('top_k'):
+        return [
+            top_k(candidates, scores, draft[4])
+            for draft, candidates, scores in zip(drafts, candidate_lists, score_lists)
+        ]
+
+def resolve_hero(item):
+    """
+    Resolves a single hero name or ID to a hero ID, or None if not recognized.
+    """
+    item = str(item).strip()
+    if item.isdigit():
+        return int(item)
+    key = item.lower().replace(' ', '').replace("'", "")
+    return HERO_NAME_TO_ID.get(key)
+
+def parse_hero_arg(arg, exit_on_error=True):
+    """
+    Accepts a comma-separated string (or a list, or a single numeric ID) of
+    hero names or IDs. Returns a list of hero IDs. Unknown heroes exit the
+    program, or raise ValueError when exit_on_error is False.
     """
     result = []
     if not arg:
         return result
-    for item in arg.split(','):
-        item = item.strip()
+    items = arg.split(',') if isinstance(arg, str) else (arg if isinstance(arg, (list, tuple)) else [arg])
+    for item in items:
+        item = str(item).strip()
         if not item:
             continue
-        if item.isdigit():
-            result.append(int(item))
-        else:
-            key = item.lower().replace(' ', '').replace("'", "")
-            if key in HERO_NAME_TO_ID:
-                result.append(HERO_NAME_TO_ID[key])
-            else:
-                print(f"Error: Hero '{item}' not recognized. Please check the name or use the hero ID.")
-                exit(1)
+        hero_id = resolve_hero(item)
+        if hero_id is None:
+            if not exit_on_error:
+                raise ValueError(f"Hero '{item}' not recognized")
+            print(f"Error: Hero '{item}' not recognized. Please check the name or use the hero ID.")
+            exit(1)
+        result.append(hero_id)
     return result
 
-def print_draft_table(team_pick, team_ban, enemy_pick, enemy_ban, suggestions):
+def validate_draft(team_pick, team_ban, enemy_pick, enemy_ban, require_picks=True):
+    """
+    Checks the draft against the pick/ban limits.
+    Returns an error message, or None if the draft is valid.
+    """
+    if require_picks and (not team_pick or not enemy_pick):
+        return 'at least one team pick and one enemy pick are required'
+    unknown = [h for h in team_pick + team_ban + enemy_pick + enemy_ban if h not in HERO_ID_TO_NAME]
+    if unknown:
+        return f'unknown hero ID(s): {unknown}'
+    if len(team_pick) > MAX_TEAM:
+        return f'team_pick accepts at most {MAX_TEAM} heroes'
+    if len(enemy_pick) > MAX_ENEMY:
+        return f'enemy_pick accepts at most {MAX_ENEMY} heroes'
+    if len(team_ban) > MAX_BAN or len(enemy_ban) > MAX_BAN:
+        return f'team_ban and enemy_ban accept at most {MAX_BAN} heroes each'
+    return None
+
+def print_draft_table(team_pick, team_ban, enemy_pick, enemy_ban, suggestions, title='Strong Recommended', details=None):
     def hero_list(ids):
         return [HERO_ID_TO_NAME.get(i, str(i)) for i in ids]
     print("="*30)
@@ -142,25 +411,233 @@ def print_draft_table(team_pick, team_ban, enemy_pick, enemy_ban, suggestions):
     for h in hero_list(enemy_pick):
         print(f"  {h}")
     print("="*30)
-    print("Strong Recommended:")
+    print(f"{title}:")
     for idx, hid in enumerate(suggestions, 1):
-        print(f"{idx}. {HERO_ID_TO_NAME.get(hid, str(hid))}")
+        detail = f"  {details[hid]}" if details and hid in details else ''
+        print(f"{idx}. {HERO_ID_TO_NAME.get(hid, str(hid))}{detail}")
+
+def format_explanation(explanation, header=''):
+    """Score breakdown of one suggestion as indented lines for print_draft_table."""
+    def entries(items):
+        return ', '.join(f"{HERO_ID_TO_NAME.get(item['hero'], str(item['hero']))} {item['value']:+.4f}"
+                         for item in items) or '-'
+    return '\n'.join([
+        header or f"(score {explanation['score']:+.4f})",
+        f"     synergy: {entries(explanation['synergy'])}",
+        f"     counter: {entries(explanation['counter'])}",
+        f"     threat:  {entries(explanation['threat'])}",
+        f"     base:    {explanation['base']:+.4f}",
+    ])
+
+def draft_json(team_pick, team_ban, enemy_pick, enemy_ban, suggestions, **fields):
+    """The draft and its suggestions ({'hero', 'name', ...fields[hero]}) as a JSON-ready dict."""
+    return {
+        'team_pick': team_pick, 'team_ban': team_ban, 'enemy_pick': enemy_pick, 'enemy_ban': enemy_ban,
+        'suggestions': [{'hero': int(hero), 'name': HERO_ID_TO_NAME.get(hero, str(hero)),
+                         **{field: values[hero] for field, values in fields.items() if hero in values}}
+                        for hero in suggestions],
+    }
+
+def parse_ranks(arg, allow_many=False):
+    """
+    Parses --rank into a list of tier values. '' selects the default data;
+    with allow_many, 'all' and comma-separated lists are accepted too.
+    """
+    if allow_many and arg.strip().lower() == 'all':
+        return list(RANKS)
+    ranks = [item.strip() for item in arg.split(',') if item.strip()] or ['']
+    if len(ranks) > 1 and not allow_many:
+        print('Error: --rank takes a single tier here.')
+        exit(1)
+    for rank in ranks:
+        if rank and rank not in RANKS:
+            print(f"Error: unknown rank '{rank}', expected one of {', '.join(RANKS)}.")
+            exit(1)
+    return ranks
 
 def main():
     args = parse_args()
+    if args.profile or args.profile_log:
+        # tracemalloc slows everything down, so only single --profile runs trace memory
+        PROFILER.enable(trace_memory=bool(args.profile))
+    if args.profile:
+        PROFILER.record('imports', _import_ms)
     if args.train:
-        train_and_save_model()
+        from train import train_and_save_model
+        for rank in parse_ranks(args.rank, allow_many=True):
+            train_and_save_model(source=args.train_source, rank=rank, full=args.full_retrain, sim_limit=args.sim_limit)
         return
-    if not (args.team_pick and args.enemy_pick):
-        print('Error: --team_pick and --enemy_pick are required unless using --train.')
+    rank = parse_ranks(args.rank)[0]
+    if args.game_length:
+        if args.engine != 'matrix' and not (args.simulate or args.win_prob):
+            print('Error: --game_length needs --engine matrix.')
+            exit(1)
+        try:
+            matrix_scorer.game_length_weights(args.game_length)
+        except ValueError as e:
+            print(f'Error: {e}.')
+            exit(1)
+    if args.simulate:
+        from simulate import SIM_PATH, run_simulation
+        run_simulation(args.simulate, output_path=rank_path(SIM_PATH, rank), mode=args.draft_mode,
+                       noise=args.sim_noise, workers=args.workers, seed=args.seed, rank=rank,
+                       game_length=args.game_length)
+        return
+    if args.evaluate:
+        from evaluate import run_evaluation, validate_grid
+        grid = None
+        if args.grid:
+            try:
+                if os.path.isfile(args.grid):
+                    with open(args.grid, 'r', encoding='utf-8') as f:
+                        grid = json.load(f)
+                else:
+                    grid = json.loads(args.grid)
+            except ValueError as e:
+                print(f"Invalid --grid: {e}")
+                exit(1)
+            error = validate_grid(grid)
+            if error:
+                print(f"Invalid --grid: {error}")
+                exit(1)
+        try:
+            ks = [int(k) for k in args.top_k.split(',') if k.strip()]
+        except ValueError:
+            ks = []
+        if not ks or min(ks) < 1:
+            print(f"Invalid --top_k: {args.top_k!r} (expected positive integers such as 1,5,10)")
+            exit(1)
+        run_evaluation(source=args.train_source, folds=args.folds, ks=ks, grid=grid,
+                       workers=args.workers, seed=args.seed, report_path=args.report, rank=rank)
+        return
+    if args.serve:
+        from server import run_server
+        run_server(host=args.host, port=args.port, socket_path=args.socket, engine=args.engine,
+                   cache_size=args.cache_size, cache_file=args.cache_file, rank=rank, max_models=args.max_models,
+                   profile_log=args.profile_log, game_length=args.game_length)
+        return
+    if args.session:
+        from session import run_session
+        draft = {field: parse_hero_arg(getattr(args, field)) for field in DRAFT_FIELDS}
+        try:
+            run_session(engine=args.engine, rank=rank, game_length=args.game_length, n_suggest=args.suggest, draft=draft)
+        except ValueError as e:
+            print(f'Error: {e}.')
+            exit(1)
+        return
+    if args.win_prob:
+        from matchup import load_matrices, print_win_probability, run_win_probability, validate_lineups
+        if args.batch:
+            run_win_probability(args.batch, output_path=args.output, rank=rank, game_length=args.game_length)
+            return
+        team_pick = parse_hero_arg(args.team_pick)
+        enemy_pick = parse_hero_arg(args.enemy_pick)
+        error = validate_lineups(team_pick, enemy_pick)
+        if error:
+            print(f'Error: {error}.')
+            exit(1)
+        probability = matrix_scorer.win_probability(load_matrices(rank, args.game_length), team_pick, enemy_pick)
+        print_win_probability(team_pick, enemy_pick, probability)
+        return
+    if args.batch:
+        from batch import run_batch
+        run_batch(args.batch, output_path=args.output, engine=args.engine, workers=args.workers,
+                  chunk_size=args.chunk_size, default_suggest=args.suggest, rank=rank, profile_log=args.profile_log,
+                  game_length=args.game_length)
+        return
+    if not (args.team_pick and args.enemy_pick) and not args.suggest_bans:
+        print('Error: --team_pick and --enemy_pick are required unless using --train, --serve, --batch or --suggest_bans.')
+        exit(1)
+    with PROFILER.phase('parse_heroes'):
+        team_pick = parse_hero_arg(args.team_pick)
+        team_ban = parse_hero_arg(args.team_ban)
+        enemy_pick = parse_hero_arg(args.enemy_pick)
+        enemy_ban = parse_hero_arg(args.enemy_ban)
+    with PROFILER.phase('validate'):
+        error = validate_draft(team_pick, team_ban, enemy_pick, enemy_ban, require_picks=not args.suggest_bans)
+    if not error and args.explain and args.engine != 'matrix':
+        error = '--explain needs --engine matrix; the forest ranking has no per-hero breakdown'
+    if error:
+        print(f'Error: {error}.')
         exit(1)
-    team_pick = parse_hero_arg(args.team_pick)
-    team_ban = parse_hero_arg(args.team_ban)
-    enemy_pick = parse_hero_arg(args.enemy_pick)
-    enemy_ban = parse_hero_arg(args.enemy_ban)
     n_suggest = args.suggest
-    suggestions = suggest_heroes(team_pick, team_ban, enemy_pick, enemy_ban, n_suggest)
-    print_draft_table(team_pick, team_ban, enemy_pick, enemy_ban, suggestions)
+    model_data = None
+    if args.game_length:
+        with PROFILER.phase('load_model'):
+            model_data = matrix_scorer.profile_matrices(load_engine('matrix', rank), args.game_length)
+    explanations = None
+    extra = {}
+    if args.suggest_bans:
+        bans = suggest_bans(team_pick, team_ban, enemy_pick, enemy_ban, n_suggest,
+                            model_data=model_data, engine=args.engine, rank=rank)
+        suggestions = [hero for hero, _ in bans]
+        impacts = dict(bans)
+    elif args.lookahead > 0:
+        from draft_search import search_draft
+        with PROFILER.phase('load_model'):
+            if model_data is None:
+                model_data = load_engine(args.engine, rank)
+            matrices = model_data if args.engine == 'matrix' else load_engine('matrix', rank)
+        suggestions, stats = search_draft(
+            team_pick, team_ban, enemy_pick, enemy_ban, n_suggest, engine=args.engine,
+            model_data=model_data, matrices=matrices,
+            depth=args.lookahead, beam=args.beam, node_budget=args.node_budget, deadline_ms=args.deadline_ms,
+            mode=args.draft_mode, first_pick=args.first_pick)
+        extra['lookahead'] = stats
+        if not args.json:
+            print(f"Lookahead: depth {stats['depth']}/{args.lookahead}, {stats['nodes']} nodes, "
+                  f"{stats['table_hits']} table hits, {stats['elapsed_ms']} ms")
+    elif args.cache_file:
+        from draft_cache import DraftCache, cached_suggest, model_version
+        with PROFILER.phase('cache_load'):
+            cache = DraftCache(max_entries=args.cache_size, path=args.cache_file)
+        version = model_version(engine_path(args.engine, rank))
+        if args.game_length:
+            version = f'{version}|{args.game_length}'
+        suggestions = cached_suggest(cache, team_pick, team_ban, enemy_pick, enemy_ban, n_suggest, version,
+                                     model_data=model_data, engine=args.engine, rank=rank)
+        with PROFILER.phase('cache_save'):
+            cache.save()
+    elif args.explain:
+        suggestions, explanations = suggest_heroes(team_pick, team_ban, enemy_pick, enemy_ban, n_suggest,
+                                                   model_data=model_data, engine=args.engine, rank=rank, explain=True)
+    else:
+        suggestions = suggest_heroes(team_pick, team_ban, enemy_pick, enemy_ban, n_suggest,
+                                     model_data=model_data, engine=args.engine, rank=rank)
+    if args.explain and explanations is None:
+        # Lookahead, cached and ban suggestions get their breakdown in one gather
+        with PROFILER.phase('explain'):
+            matrices = model_data if model_data is not None else load_engine('matrix', rank)
+            # Bans are explained as the enemy's picks
+            own, other = (enemy_pick, team_pick) if args.suggest_bans else (team_pick, enemy_pick)
+            explanations = matrix_scorer.explain_candidates(matrices, own, other, suggestions)
+    explanations = dict(zip(suggestions, explanations)) if explanations is not None else {}
+    with PROFILER.phase('output'):
+        if args.json:
+            fields = {'explanation': explanations}
+            if args.suggest_bans:
+                fields['impact'] = {hero: round(impact, 6) for hero, impact in impacts.items()}
+            # suggest_bans ranks the ban phase (no enemy picks yet) with the matrices
+            engine = 'matrix' if args.suggest_bans and not enemy_pick else args.engine
+            print(json.dumps({'engine': engine, 'rank': rank, **extra,
+                              **draft_json(team_pick, team_ban, enemy_pick, enemy_ban, suggestions, **fields)}))
+        elif args.suggest_bans:
+            details = {hero: f'(enemy loses {impact:.4f})' for hero, impact in impacts.items() if impact > 0}
+            for hero, explanation in explanations.items():
+                header = f"(enemy loses {impacts[hero]:.4f}, enemy score {explanation['score']:+.4f})"
+                details[hero] = format_explanation(explanation, header)
+            print_draft_table(team_pick, team_ban, enemy_pick, enemy_ban, suggestions, title='Recommended Bans',
+                              details=details)
+        else:
+            print_draft_table(team_pick, team_ban, enemy_pick, enemy_ban, suggestions,
+                              details={hero: format_explanation(e) for hero, e in explanations.items()})
+    if args.profile:
+        from profiling import print_profile, write_profile
+        records = PROFILER.collect()
+        if args.profile == '-':
+            print_profile(records)
+        else:
+            write_profile(records, args.profile)
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,114 @@
+"""
+Win probability of complete lineups for the MLBB Draft Assistant.
+
+Estimates the chance that one five-hero lineup beats another from the
+synergy/counter matrices (matrix_scorer.win_probability_batch). Files of
+lineups are read in chunks, and every chunk is scored in one NumPy pass.
+
+Input fields (JSONL keys or CSV columns, as for --batch): team_pick and
+enemy_pick, each five heroes given as names or IDs in a comma-separated
+string or (JSONL only) a list. A game-length profile applies to the whole
+run.
+"""
+import json
+import sys
+import time
+from itertools import islice
+
+import numpy as np
+
+import matrix_scorer
+from batch import read_drafts
+from main import HERO_ID_TO_NAME, MAX_ENEMY, load_engine, parse_hero_arg
+
+LINEUP_SIZE = MAX_ENEMY
+# Lineups parsed and scored per NumPy pass
+CHUNK_LINEUPS = 65536
+
+
+def load_matrices(rank='', game_length=''):
+    matrices = load_engine('matrix', rank)
+    if game_length:
+        matrices = matrix_scorer.profile_matrices(matrices, game_length)
+    return matrices
+
+
+def validate_lineups(team, enemy):
+    """Returns an error message, or None if both lineups are complete and disjoint."""
+    if len(team) != LINEUP_SIZE or len(enemy) != LINEUP_SIZE:
+        return f'team_pick and enemy_pick need exactly {LINEUP_SIZE} heroes each'
+    unknown = [h for h in team + enemy if h not in HERO_ID_TO_NAME]
+    if unknown:
+        return f'unknown hero ID(s): {unknown}'
+    if len(set(team + enemy)) != 2 * LINEUP_SIZE:
+        return 'a hero can be picked only once per draft'
+    return None
+
+
+def parse_lineup(record):
+    """Returns (team, enemy) hero ID lists. Raises ValueError for invalid lineups."""
+    team = parse_hero_arg(record.get('team_pick'), exit_on_error=False)
+    enemy = parse_hero_arg(record.get('enemy_pick'), exit_on_error=False)
+    error = validate_lineups(team, enemy)
+    if error:
+        raise ValueError(error)
+    return team, enemy
+
+
+def score_lineups(matrices, records):
+    """
+    Win probabilities for a list of raw input records, in one pass over
+    all valid lineups. Invalid records get an error entry instead.
+    """
+    results, teams, enemies = [], [], []
+    for record in records:
+        try:
+            team, enemy = parse_lineup(record)
+        except (ValueError, TypeError, AttributeError) as e:
+            results.append({'error': str(e)})
+            continue
+        teams.append(team)
+        enemies.append(enemy)
+        results.append(None)
+    if not teams:
+        return results
+    probabilities = iter(matrix_scorer.win_probability_batch(matrices, np.array(teams), np.array(enemies)))
+    return [result if result is not None else {'win_probability': round(float(next(probabilities)), 6)}
+            for result in results]
+
+
+def run_win_probability(input_path, output_path='', rank='', game_length=''):
+    """
+    Writes the win probability of every lineup in input_path, one JSON
+    result per line (with its 0-based input index), to output_path or
+    stdout. Returns the number of lineups read.
+    """
+    start = time.perf_counter()
+    matrices = load_matrices(rank, game_length)
+    records = read_drafts(input_path)
+    out = open(output_path, 'w', encoding='utf-8') if output_path else sys.stdout
+    index = 0
+    try:
+        while True:
+            chunk = list(islice(records, CHUNK_LINEUPS))
+            if not chunk:
+                break
+            for result in score_lineups(matrices, chunk):
+                out.write(json.dumps({'index': index, **result}) + '\n')
+                index += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - start
+    rate = index / elapsed if elapsed > 0 else 0.0
+    print(f'Scored {index} lineups in {elapsed:.2f}s ({rate:.0f} lineups/s)', file=sys.stderr)
+    return index
+
+
+def print_win_probability(team, enemy, probability):
+    print('=' * 30)
+    print('Team:  ' + ', '.join(HERO_ID_TO_NAME.get(h, str(h)) for h in team))
+    print('Enemy: ' + ', '.join(HERO_ID_TO_NAME.get(h, str(h)) for h in enemy))
+    print('-' * 30)
+    print(f'Win probability: {probability:.1%} team / {1 - probability:.1%} enemy')
+    print('=' * 30)
@@ -0,0 +1,385 @@
+"""
+Analytic synergy/counter scorer for the MLBB Draft Assistant.
+
+Builds dense hero x hero matrices from the hero_counter and
+hero_compatibility snapshots (the fetcher's snapshot store, or its JSON
+files when a data directory has no store) and scores every candidate
+against the whole draft (team picks and enemy picks) in a single
+vectorized operation.
+
+Matrix layout (row/column i is hero ID i + 1):
+    synergy[m, s]  win rate gained by s when teamed with m
+    counter[m, s]  win rate gained by s when facing m
+
+Each entry also carries win rates by game duration (min_win_rate6 ...
+min_win_rate20). They are kept as [hero, sub_hero, bucket] float32 tensors
+(synergy_curve, counter_curve) with 0 for missing pairs. For a game-length
+profile, profile_matrices reduces them to one adjustment per pair: how much
+better than the average pair the pair does in games of that length. The
+adjusted matrices are scored exactly like the plain ones.
+"""
+import json
+import os
+import sys
+
+import numpy as np
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), '..', 'data')
+MATRIX_PATH = os.path.join(os.path.dirname(__file__), 'hero_matrices.npz')
+# Directory of the fetcher's snapshot_store.py; only open_snapshot_store imports it
+FETCHER_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'DataFetching')
+
+N_HEROES = 128
+
+# Duration buckets of the snapshots, in minutes (min_win_rate<bucket> fields)
+DURATION_BUCKETS = ('6', '6_8', '8_10', '10_12', '12_14', '14_16', '16_18', '18_20', '20')
+# Bucket weights of the named game-length profiles (normalized on use)
+GAME_LENGTH_PROFILES = {
+    'early': (1, 1, 1, 1, 0.5, 0, 0, 0, 0),
+    'mid': (0, 0, 0.5, 1, 1, 1, 0.5, 0, 0),
+    'late': (0, 0, 0, 0, 0, 0.5, 1, 1, 1),
+}
+# Weight of the duration adjustment relative to the overall win-rate gain
+CURVE_WEIGHT = 1.0
+
+# Relative weight of each score component
+SYNERGY_WEIGHT = 1.0
+COUNTER_WEIGHT = 1.0
+THREAT_WEIGHT = 1.0
+BASE_WEIGHT = 0.5
+# composition_score -> win probability: sigmoid(4x) ~ 0.5 + x near even drafts,
+# matching the win-rate units of the matrices
+OUTCOME_SCALE = 4.0
+
+
+def open_snapshot_store(data_dir):
+    """
+    The fetcher's snapshot store in data_dir, or None if its snapshots are
+    JSON files only. This is the one place the HeroSuggestor modules load
+    the store reader from the DataFetching directory.
+    """
+    if FETCHER_DIR not in sys.path:
+        sys.path.append(FETCHER_DIR)
+    from snapshot_store import open_store
+    return open_store(data_dir)
+
+
+def iter_snapshot_records(data_dir, kind, hero_ids=None):
+    """
+    Yields the record 'data' dicts saved by the fetcher for one kind
+    ('hero_counter' or 'hero_compatibility'), for all heroes or only the
+    snapshots of hero_ids. They are read from the snapshot store if data_dir
+    has one, else from the JSON files. Missing or broken snapshots are skipped.
+    """
+    store = open_snapshot_store(data_dir)
+    try:
+        for hero_id in (range(1, N_HEROES + 1) if hero_ids is None else hero_ids):
+            try:
+                if store is not None:
+                    records = store.get(kind, hero_id)['data']['records']
+                else:
+                    with open(os.path.join(data_dir, kind, f'{hero_id}.json'), 'r', encoding='utf-8') as f:
+                        records = json.load(f)['data']['records']
+            except (OSError, ValueError, KeyError, TypeError):
+                continue
+            for record in records or []:
+                data = record.get('data', {})
+                if data.get('main_heroid') is not None:
+                    yield data
+    finally:
+        if store is not None:
+            store.close()
+
+
+def fill_matrix(matrix, records, curve=None):
+    """
+    Writes increase_win_rate of every sub_hero/sub_hero_last entry into
+    matrix and, if given, its duration-bucket win rates into curve.
+    """
+    for data in records:
+        main = int(data['main_heroid']) - 1
+        for entry in data.get('sub_hero', []) + data.get('sub_hero_last', []):
+            sub = entry.get('heroid')
+            rate = entry.get('increase_win_rate')
+            if sub is None or rate is None or not 1 <= int(sub) <= N_HEROES:
+                continue
+            matrix[main, int(sub) - 1] = rate
+            if curve is not None:
+                curve[main, int(sub) - 1] = [entry.get(f'min_win_rate{bucket}') or 0.0 for bucket in DURATION_BUCKETS]
+
+
+def build_matrices(data_dir=DATA_DIR):
+    """
+    Builds the synergy/counter matrices and per-hero base win rates
+    from the JSON snapshots in data_dir.
+    """
+    return update_matrices(None, data_dir)
+
+
+def update_matrices(matrices, data_dir=DATA_DIR, hero_ids=None):
+    """
+    Rebuilds the rows of hero_ids (all heroes if None) from their own
+    snapshot files and keeps every other row of matrices. Each snapshot only
+    describes its main hero, so a hero's row depends on its files alone.
+    Returns a new matrices dict.
+    """
+    if matrices is None or hero_ids is None or 'synergy_curve' not in matrices:
+        synergy = np.zeros((N_HEROES, N_HEROES), dtype=np.float32)
+        counter = np.zeros((N_HEROES, N_HEROES), dtype=np.float32)
+        synergy_curve = np.zeros((N_HEROES, N_HEROES, len(DURATION_BUCKETS)), dtype=np.float32)
+        counter_curve = np.zeros((N_HEROES, N_HEROES, len(DURATION_BUCKETS)), dtype=np.float32)
+        base = np.zeros(N_HEROES, dtype=np.float32)
+        known = np.zeros(N_HEROES, dtype=bool)
+        hero_ids = None
+    else:
+        synergy = matrices['synergy'].copy()
+        counter = matrices['counter'].copy()
+        synergy_curve = matrices['synergy_curve'].copy()
+        counter_curve = matrices['counter_curve'].copy()
+        base = matrices['base'].copy()
+        known = np.zeros(N_HEROES, dtype=bool)
+        known[np.asarray(matrices['hero_ids'], dtype=np.intp) - 1] = True
+        rows = np.asarray(hero_ids, dtype=np.intp) - 1
+        for array in (synergy, counter, synergy_curve, counter_curve, base):
+            array[rows] = 0
+        known[rows] = False
+    for kind, matrix, curve in (('hero_compatibility', synergy, synergy_curve),
+                                ('hero_counter', counter, counter_curve)):
+        records = list(iter_snapshot_records(data_dir, kind, hero_ids))
+        fill_matrix(matrix, records, curve)
+        for data in records:
+            main = int(data['main_heroid']) - 1
+            known[main] = True
+            if data.get('main_hero_win_rate') is not None:
+                base[main] = data['main_hero_win_rate'] - 0.5
+    return {
+        'synergy': synergy,
+        'counter': counter,
+        'synergy_curve': synergy_curve,
+        'counter_curve': counter_curve,
+        'base': base,
+        'hero_ids': np.flatnonzero(known) + 1,
+    }
+
+
+def save_matrices(matrices, path=MATRIX_PATH):
+    np.savez(path, **{key: value for key, value in matrices.items() if isinstance(value, np.ndarray)})
+
+
+def load_matrices(path=MATRIX_PATH, data_dir=DATA_DIR):
+    """
+    Loads the precomputed matrices, building and caching them on first use
+    (or when the cached file predates a matrix it should contain).
+    """
+    if os.path.exists(path):
+        with np.load(path) as f:
+            if 'synergy_curve' in f.files:
+                return {key: f[key] for key in f.files}
+    matrices = build_matrices(data_dir)
+    save_matrices(matrices, path)
+    return matrices
+
+
+def game_length_weights(profile):
+    """
+    Bucket weights for a profile name from GAME_LENGTH_PROFILES or a
+    comma-separated list of one weight per duration bucket. Raises ValueError.
+    """
+    if profile in GAME_LENGTH_PROFILES:
+        weights = np.array(GAME_LENGTH_PROFILES[profile], dtype=np.float32)
+    else:
+        try:
+            weights = np.array([float(w) for w in profile.split(',')], dtype=np.float32)
+        except ValueError:
+            weights = np.zeros(0, dtype=np.float32)
+        if len(weights) != len(DURATION_BUCKETS) or np.any(weights < 0) or weights.sum() == 0:
+            raise ValueError(f"game length must be one of {', '.join(GAME_LENGTH_PROFILES)} or "
+                             f"{len(DURATION_BUCKETS)} non-negative comma-separated bucket weights")
+    return weights / weights.sum()
+
+
+def curve_adjustment(curve, weights):
+    """
+    Reduces a [hero, sub_hero, bucket] tensor with bucket weights to a
+    [hero, sub_hero] matrix. Each bucket is first centered on the mean win
+    rate of all known pairs in it, so buckets where every pair wins less
+    (very short games) do not dominate. Missing pairs stay 0.
+    """
+    known = curve.any(axis=2)
+    if not known.any():
+        return np.zeros(curve.shape[:2], dtype=np.float32)
+    bucket_means = curve[known].mean(axis=0)
+    return np.where(known, (curve - bucket_means) @ weights, 0).astype(np.float32)
+
+
+def profile_matrices(matrices, profile):
+    """
+    Returns matrices whose synergy and counter include the duration
+    adjustment for a game-length profile (see game_length_weights). Named
+    profiles are cached in matrices, so repeated calls cost a dict lookup;
+    custom weights are computed on every call, so clients sending arbitrary
+    weights cannot grow the cache.
+    """
+    weights = game_length_weights(profile)
+    cache = matrices.setdefault('profiles', {})
+    if profile in cache:
+        return cache[profile]
+    profiled = {
+        **{k: v for k, v in matrices.items() if k != 'profiles'},
+        'synergy': matrices['synergy'] + CURVE_WEIGHT * curve_adjustment(matrices['synergy_curve'], weights),
+        'counter': matrices['counter'] + CURVE_WEIGHT * curve_adjustment(matrices['counter_curve'], weights),
+    }
+    if profile in GAME_LENGTH_PROFILES:
+        cache[profile] = profiled
+    return profiled
+
+
+def score_all(matrices, team_pick, enemy_pick):
+    """
+    Scores every hero against the full draft in one pass.
+    Returns a length-N_HEROES vector indexed by hero ID - 1.
+    """
+    team = np.asarray(team_pick, dtype=np.intp) - 1
+    enemy = np.asarray(enemy_pick, dtype=np.intp) - 1
+    counter = matrices['counter']
+    return (SYNERGY_WEIGHT * matrices['synergy'][team].sum(axis=0)
+            + COUNTER_WEIGHT * counter[enemy].sum(axis=0)
+            - THREAT_WEIGHT * counter[:, enemy].sum(axis=1)
+            + BASE_WEIGHT * matrices['base'])
+
+
+def score_all_batch(matrices, team_picks, enemy_picks):
+    """
+    score_all for many drafts at once: one row per draft, computed with
+    matrix products over hero indicator matrices.
+    """
+    team = indicator_matrix(team_picks)
+    enemy = indicator_matrix(enemy_picks)
+    counter = matrices['counter']
+    return (SYNERGY_WEIGHT * (team @ matrices['synergy'])
+            + COUNTER_WEIGHT * (enemy @ counter)
+            - THREAT_WEIGHT * (enemy @ counter.T)
+            + BASE_WEIGHT * matrices['base'])
+
+
+def indicator_matrix(hero_lists):
+    """Rows of 0/1 flags (column i is hero ID i + 1), one row per hero list."""
+    rows = np.repeat(np.arange(len(hero_lists)), [len(heroes) for heroes in hero_lists])
+    cols = np.fromiter((h - 1 for heroes in hero_lists for h in heroes), dtype=np.intp, count=len(rows))
+    matrix = np.zeros((len(hero_lists), N_HEROES), dtype=np.float32)
+    np.add.at(matrix, (rows, cols), 1.0)
+    return matrix
+
+
+def score_candidates(matrices, team_pick, enemy_pick, candidates):
+    return score_all(matrices, team_pick, enemy_pick)[np.asarray(candidates) - 1]
+
+
+def score_breakdown(matrices, team_pick, enemy_pick, candidates):
+    """
+    score_candidates split into its weighted parts, from the same gathers.
+    Column j is candidates[j]: synergy[i, j] with ally team_pick[i],
+    counter[i, j] against enemy_pick[i], threat[i, j] from enemy_pick[i]
+    (negative when it counters the candidate) and base[j]. 'score' is
+    their sum.
+    """
+    team = np.asarray(team_pick, dtype=np.intp) - 1
+    enemy = np.asarray(enemy_pick, dtype=np.intp) - 1
+    cand = np.asarray(candidates, dtype=np.intp) - 1
+    counter = matrices['counter']
+    parts = {
+        'synergy': SYNERGY_WEIGHT * matrices['synergy'][team][:, cand],
+        'counter': COUNTER_WEIGHT * counter[enemy][:, cand],
+        'threat': -THREAT_WEIGHT * counter[cand][:, enemy].T,
+        'base': BASE_WEIGHT * matrices['base'][cand],
+    }
+    parts['score'] = parts['synergy'].sum(axis=0) + parts['counter'].sum(axis=0) + parts['threat'].sum(axis=0) + parts['base']
+    return parts
+
+
+def explain_columns(parts, team_pick, enemy_pick, columns):
+    """
+    JSON-ready explanations of the given score_breakdown columns: the score,
+    its base part and one {'hero', 'value'} entry per ally (synergy) and
+    per enemy pick (counter, threat).
+    """
+    def entries(matrix, heroes, column):
+        return [{'hero': int(hero), 'value': round(float(value), 6) + 0.0} for hero, value in zip(heroes, matrix[:, column])]
+
+    return [{
+        'score': round(float(parts['score'][column]), 6),
+        'base': round(float(parts['base'][column]), 6),
+        'synergy': entries(parts['synergy'], team_pick, column),
+        'counter': entries(parts['counter'], enemy_pick, column),
+        'threat': entries(parts['threat'], enemy_pick, column),
+    } for column in columns]
+
+
+def explain_candidates(matrices, team_pick, enemy_pick, candidates):
+    """Explanations of candidates' matrix scores, in candidates order."""
+    parts = score_breakdown(matrices, team_pick, enemy_pick, candidates)
+    return explain_columns(parts, team_pick, enemy_pick, range(len(candidates)))
+
+
+def composition_score(matrices, team, enemy):
+    """
+    Scores a (possibly partial) team lineup against an enemy lineup.
+    Positive values favour the team; the enemy's score is the negation.
+    """
+    team = np.asarray(team, dtype=np.intp) - 1
+    enemy = np.asarray(enemy, dtype=np.intp) - 1
+    synergy = matrices['synergy']
+    counter = matrices['counter']
+    base = matrices['base']
+    return float(SYNERGY_WEIGHT * (synergy[team][:, team].sum() - synergy[enemy][:, enemy].sum())
+                 + COUNTER_WEIGHT * counter[enemy][:, team].sum()
+                 - THREAT_WEIGHT * counter[team][:, enemy].sum()
+                 + BASE_WEIGHT * (base[team].sum() - base[enemy].sum()))
+
+
+def composition_score_batch(matrices, teams, enemies):
+    """
+    composition_score for many lineups at once. teams and enemies are
+    (n, team size) arrays of hero IDs, one lineup pair per row; every pair
+    sum is a single gather over all rows.
+    """
+    team = np.asarray(teams, dtype=np.intp) - 1
+    enemy = np.asarray(enemies, dtype=np.intp) - 1
+    synergy = matrices['synergy']
+    counter = matrices['counter']
+    base = matrices['base']
+
+    def pair_sum(matrix, rows, cols):
+        return matrix[rows[:, :, None], cols[:, None, :]].sum(axis=(1, 2))
+
+    return (SYNERGY_WEIGHT * (pair_sum(synergy, team, team) - pair_sum(synergy, enemy, enemy))
+            + COUNTER_WEIGHT * pair_sum(counter, enemy, team)
+            - THREAT_WEIGHT * pair_sum(counter, team, enemy)
+            + BASE_WEIGHT * (base[team].sum(axis=1) - base[enemy].sum(axis=1)))
+
+
+def win_probability(matrices, team, enemy):
+    """Estimated probability that team beats enemy, from their composition_score."""
+    return float(win_probability_batch(matrices, [team], [enemy])[0])
+
+
+def win_probability_batch(matrices, teams, enemies):
+    """win_probability for each row of (n, team size) lineup arrays."""
+    score = composition_score_batch(matrices, teams, enemies).astype(np.float64)
+    return 1.0 / (1.0 + np.exp(-OUTCOME_SCALE * score))
+
+
+def pick_deltas(matrices, own, other, candidates):
+    """
+    Change in composition_score (from own's side) if own adds each candidate.
+    Lets a search evaluate all children of a node in one pass.
+    """
+    own = np.asarray(own, dtype=np.intp) - 1
+    other = np.asarray(other, dtype=np.intp) - 1
+    cand = np.asarray(candidates, dtype=np.intp) - 1
+    synergy = matrices['synergy']
+    counter = matrices['counter']
+    return (SYNERGY_WEIGHT * (synergy[own][:, cand].sum(axis=0) + synergy[cand][:, own].sum(axis=1))
+            + COUNTER_WEIGHT * counter[other][:, cand].sum(axis=0)
+            - THREAT_WEIGHT * counter[cand][:, other].sum(axis=1)
+            + BASE_WEIGHT * matrices['base'][cand])
@@ -0,0 +1,94 @@
+"""
+Per-rank model registry for the MLBB Draft Assistant.
+
+Every rank tier (see main.RANKS) has its own trained models. The registry
+loads a tier's model the first time it is asked for and keeps at most
+max_models of them resident, evicting the least recently used one, so a
+long-running process does not hold every tier in memory at once.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+from main import ENGINES, RANKS, engine_path, load_engine, rank_data_dir
+
+DEFAULT_MAX_MODELS = 2
+
+
+def check_available(engine, rank=''):
+    """
+    Raises ValueError unless the engine's model for the tier can be loaded.
+    Matrices can be built on first use from the tier's snapshots; the forest
+    has to be trained first.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f'unknown engine {engine!r}, expected one of {list(ENGINES)}')
+    if rank and rank not in RANKS:
+        raise ValueError(f'unknown rank {rank!r}, expected one of {list(RANKS)}')
+    if os.path.exists(engine_path(engine, rank)):
+        return
+    rank_arg = f' --rank {rank}' if rank else ''
+    if engine == 'forest':
+        raise ValueError(f'model not found, run main.py --train{rank_arg} first')
+    if not os.path.isdir(rank_data_dir(rank)):
+        raise ValueError(f'no snapshot data for rank {rank} in {os.path.normpath(rank_data_dir(rank))}')
+
+
+class ModelRegistry:
+    """
+    Thread-safe LRU of loaded models keyed by (engine, rank). loader(engine,
+    rank) builds an entry; by default it is main.load_engine, so entries
+    are model_data dicts.
+    """
+
+    def __init__(self, max_models=DEFAULT_MAX_MODELS, loader=load_engine):
+        self.max_models = max(1, max_models)
+        self.loader = loader
+        self.entries = OrderedDict()
+        self.loads = 0
+        self.evictions = 0
+        self._loading = {}
+        self._lock = threading.Lock()
+
+    def get(self, engine, rank=''):
+        """Returns the entry for (engine, rank), loading it on first use."""
+        key = (engine, rank)
+        with self._lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return self.entries[key]
+            key_lock = self._loading.setdefault(key, threading.Lock())
+        # Load outside the registry lock so requests for resident models are not held up
+        with key_lock:
+            with self._lock:
+                if key in self.entries:
+                    self.entries.move_to_end(key)
+                    return self.entries[key]
+            try:
+                check_available(engine, rank)
+                entry = self.loader(engine, rank)
+            except Exception:
+                with self._lock:
+                    self._loading.pop(key, None)
+                raise
+            with self._lock:
+                self._loading.pop(key, None)
+                self.entries[key] = entry
+                self.loads += 1
+                while len(self.entries) > self.max_models:
+                    self.entries.popitem(last=False)
+                    self.evictions += 1
+            return entry
+
+    def items(self):
+        with self._lock:
+            return list(self.entries.items())
+
+    def stats(self):
+        with self._lock:
+            return {
+                'loaded': [f'{engine}:{rank or "default"}' for engine, rank in self.entries],
+                'max_models': self.max_models,
+                'loads': self.loads,
+                'evictions': self.evictions,
+            }
@@ -0,0 +1,120 @@
+"""
+Phase timing for the MLBB Draft Assistant.
+
+The suggestion hot path is split into named phases (imports, load_model,
+parse_heroes, score, ...). While the global PROFILER is enabled, each phase
+records its wall time and the change in allocated memory blocks
+(sys.getallocatedblocks); with memory tracing on, it also records the peak
+bytes allocated inside the phase (tracemalloc). When disabled, a phase is a
+shared no-op context, so the instrumentation costs nothing in normal runs.
+
+Records are kept per thread, so server request threads do not mix. The
+block counts are process-wide and only indicative under concurrency.
+"""
+import json
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+_NULL_PHASE = nullcontext()
+
+
+class Profiler:
+    """Collects per-phase records for the current thread while enabled."""
+
+    def __init__(self):
+        self.enabled = False
+        self.trace_memory = False
+        self._local = threading.local()
+
+    def enable(self, trace_memory=False):
+        self.enabled = True
+        self.trace_memory = trace_memory
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def phase(self, name):
+        """Context manager timing one phase. Phases should not be nested."""
+        if not self.enabled:
+            return _NULL_PHASE
+        return self._measure(name)
+
+    @contextmanager
+    def _measure(self, name):
+        blocks = sys.getallocatedblocks()
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            traced = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            record = {'phase': name, 'ms': round(elapsed_ms, 3), 'blocks': sys.getallocatedblocks() - blocks}
+            if self.trace_memory:
+                record['peak_kb'] = round((tracemalloc.get_traced_memory()[1] - traced) / 1024, 1)
+            self._records().append(record)
+
+    def record(self, name, ms, **fields):
+        """Adds a phase measured elsewhere (e.g. module imports)."""
+        if self.enabled:
+            self._records().append({'phase': name, 'ms': round(ms, 3), **fields})
+
+    def collect(self):
+        """Returns and clears the current thread's records."""
+        records = self._records()
+        self._local.records = []
+        return records
+
+    def _records(self):
+        if not hasattr(self._local, 'records'):
+            self._local.records = []
+        return self._local.records
+
+
+PROFILER = Profiler()
+
+
+def summarize(records):
+    return {'phases': records, 'total_ms': round(sum(record['ms'] for record in records), 3)}
+
+
+def print_profile(records, file=sys.stdout):
+    """Prints records as a table, slowest phase marked."""
+    if not records:
+        return
+    slowest = max(records, key=lambda record: record['ms'])
+    print('Profile:', file=file)
+    for record in records:
+        extra = f"  {record['blocks']:+d} blocks" if 'blocks' in record else ''
+        if 'peak_kb' in record:
+            extra += f"  peak {record['peak_kb']} KiB"
+        marker = '  <- slowest' if record is slowest else ''
+        print(f"  {record['phase']:<14}{record['ms']:>10.3f} ms{extra}{marker}", file=file)
+    print(f"  {'total':<14}{summarize(records)['total_ms']:>10.3f} ms", file=file)
+
+
+def write_profile(records, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(summarize(records), f, indent=2)
+
+
+class ProfileLog:
+    """Appends one JSON line of phase records per server request or batch chunk."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def write(self, records, **fields):
+        line = json.dumps({'ts': round(time.time(), 3), **fields, **summarize(records)})
+        with self._lock:
+            self._file.write(line + '\n')
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
@@ -0,0 +1,295 @@
+"""
+Long-running suggestion server for the MLBB Draft Assistant.
+
+Loads the model once and answers JSON draft requests over HTTP, either on a
+local TCP port or on a Unix socket:
+
+    POST /suggest  {"team_pick": "miya,yve", "enemy_pick": [124], "suggest": 5}
+    GET  /stats    request counts, latency and cache statistics
+    POST /reload   reload the model file in the background
+
+Heroes may be given as a comma-separated string, a JSON list of names/IDs or
+a single numeric ID, like the CLI arguments. A request may pick its scoring
+engine with "engine", its rank tier with "rank" and a game-length profile
+(matrix engine) with "game_length"; otherwise the ones given to --serve are
+used. With "explain": true (matrix engine) the response also carries the
+score breakdown of each suggestion. Models are loaded per (engine, rank) on
+first use and at most --max_models of them stay resident.
+"""
+import json
+import os
+import socketserver
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+import matrix_scorer
+from draft_cache import DEFAULT_MAX_ENTRIES, DraftCache, cached_suggest, model_version
+from main import DRAFT_FIELDS, engine_path, load_engine, parse_hero_arg, rank_data_dir, read_model, validate_draft
+from model_registry import DEFAULT_MAX_MODELS, ModelRegistry
+from profiling import PROFILER, ProfileLog
+
+LATENCY_WINDOW = 1000
+
+
+class ModelHolder:
+    """
+    Holds the resident model of one scoring engine and rank tier. Reloads build the new
+    model on a background thread and swap it in with a single assignment,
+    so requests keep being answered with the old model until the new one
+    is ready.
+    """
+
+    def __init__(self, engine='forest', rank=''):
+        self.engine = engine
+        self.rank = rank
+        self.model_version = model_version(self.path)
+        self.model_data = load_engine(engine, rank)
+        self.version = 1
+        self.loaded_at = time.time()
+        self.reloading = False
+        self._lock = threading.Lock()
+
+    @property
+    def path(self):
+        # Resolved on every use so a compact model written by a retrain is picked up on reload
+        return engine_path(self.engine, self.rank)
+
+    @property
+    def name(self):
+        return f'{self.engine}:{self.rank or "default"}'
+
+    def get(self):
+        return self.model_data
+
+    def reload(self):
+        """
+        Starts a background reload. Returns False if one is already running.
+        """
+        with self._lock:
+            if self.reloading:
+                return False
+            self.reloading = True
+        threading.Thread(target=self._reload, daemon=True).start()
+        return True
+
+    def _reload(self):
+        try:
+            path = self.path
+            if self.engine == 'matrix':
+                model_data = matrix_scorer.load_matrices(path, rank_data_dir(self.rank))
+            else:
+                model_data = read_model(path)
+            # Swap the model before its version so cached results never pair a new version with the old model
+            self.model_data = model_data
+            self.model_version = model_version(path)
+            self.version += 1
+            self.loaded_at = time.time()
+            print(f'{self.name} model reloaded (version {self.version}).')
+        except Exception as e:
+            print(f'{self.name} model reload failed, keeping the current model: {e}')
+        finally:
+            self.reloading = False
+
+
+class ServerStats:
+    """Thread-safe request counters and a window of recent latencies."""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.requests = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.recent_ms = deque(maxlen=LATENCY_WINDOW)
+        self._lock = threading.Lock()
+
+    def record(self, elapsed_ms, ok):
+        with self._lock:
+            self.requests += 1
+            if not ok:
+                self.errors += 1
+            self.total_ms += elapsed_ms
+            self.max_ms = max(self.max_ms, elapsed_ms)
+            self.recent_ms.append(elapsed_ms)
+
+    def snapshot(self):
+        with self._lock:
+            recent = np.array(self.recent_ms) if self.recent_ms else np.zeros(1)
+            return {
+                'uptime_s': round(time.time() - self.started_at, 3),
+                'requests': self.requests,
+                'errors': self.errors,
+                'mean_ms': round(self.total_ms / self.requests, 3) if self.requests else 0.0,
+                'max_ms': round(self.max_ms, 3),
+                'p50_ms': round(float(np.percentile(recent, 50)), 3),
+                'p95_ms': round(float(np.percentile(recent, 95)), 3),
+                'p99_ms': round(float(np.percentile(recent, 99)), 3),
+            }
+
+
+def handle_suggest(request, holder, cache, default_game_length=''):
+    """
+    Applies the CLI rules to a JSON draft request and returns the response body.
+    Raises ValueError for invalid drafts.
+    """
+    with PROFILER.phase('parse_heroes'):
+        draft = {field: parse_hero_arg(request.get(field), exit_on_error=False) for field in DRAFT_FIELDS}
+    with PROFILER.phase('validate'):
+        error = validate_draft(**draft)
+    if error:
+        raise ValueError(error)
+    n_suggest = int(request.get('suggest', 5))
+    if request.get('explain') and holder.engine != 'matrix':
+        raise ValueError('explain needs the matrix engine')
+    # Read the version before the model (ModelHolder swaps them in the opposite order)
+    version = holder.model_version
+    model_data = holder.get()
+    game_length = request.get('game_length', default_game_length)
+    if game_length:
+        if holder.engine != 'matrix':
+            raise ValueError('game_length needs the matrix engine')
+        model_data = matrix_scorer.profile_matrices(model_data, str(game_length))
+        version = f'{version}|{game_length}'
+    suggestions = cached_suggest(cache, n_suggest=n_suggest, version=version, model_data=model_data,
+                                 engine=holder.engine, rank=holder.rank, **draft)
+    body = {'suggestions': suggestions, 'engine': holder.engine, 'rank': holder.rank}
+    if request.get('explain'):
+        with PROFILER.phase('explain'):
+            body['explanations'] = matrix_scorer.explain_candidates(model_data, draft['team_pick'],
+                                                                    draft['enemy_pick'], suggestions)
+    return body
+
+
+class SuggestionServerMixin:
+    """
+    State shared by the TCP and Unix socket servers: a registry of
+    ModelHolders per (engine, rank), loaded on first use, the draft cache
+    and the request stats.
+    """
+
+    def setup_state(self, engine, cache, rank='', max_models=DEFAULT_MAX_MODELS, profile_log=None, game_length=''):
+        self.profile_log = profile_log
+        self.game_length = game_length
+        self.default_engine = engine
+        self.default_rank = rank
+        self.holders = ModelRegistry(max_models=max_models, loader=ModelHolder)
+        self.holders.get(engine, rank)
+        self.cache = cache
+        self.stats = ServerStats()
+
+    def holder(self, engine=None, rank=None):
+        engine = engine or self.default_engine
+        rank = self.default_rank if rank is None else str(rank)
+        return self.holders.get(engine, rank)
+
+
+class SuggestionHandler(BaseHTTPRequestHandler):
+    """HTTP handler; the server instance carries the model holders and stats."""
+
+    def do_GET(self):
+        if self.path == '/stats':
+            body = self.server.stats.snapshot()
+            body['models'] = {
+                holder.name: {'version': holder.version, 'reloading': holder.reloading}
+                for _, holder in self.server.holders.items()
+            }
+            body['registry'] = self.server.holders.stats()
+            body['cache'] = self.server.cache.stats()
+            self._send(200, body)
+        else:
+            self._send(404, {'error': f'unknown path {self.path}'})
+
+    def do_POST(self):
+        if self.path == '/suggest':
+            self._suggest()
+        elif self.path == '/reload':
+            status = {}
+            for _, holder in self.server.holders.items():
+                if not os.path.exists(holder.path):
+                    status[holder.name] = 'model file not found'
+                elif holder.reload():
+                    status[holder.name] = 'reloading'
+                else:
+                    status[holder.name] = 'reload already in progress'
+            self._send(202, {'status': status})
+        else:
+            self._send(404, {'error': f'unknown path {self.path}'})
+
+    def _suggest(self):
+        start = time.perf_counter()
+        ok = False
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            request = json.loads(self.rfile.read(length) or b'{}')
+            holder = self.server.holder(request.get('engine'), request.get('rank'))
+            body = handle_suggest(request, holder, self.server.cache, self.server.game_length)
+            ok = True
+        except (ValueError, TypeError, AttributeError) as e:
+            body = {'error': str(e)}
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.server.stats.record(elapsed_ms, ok)
+        if self.server.profile_log:
+            self.server.profile_log.write(PROFILER.collect(), mode='serve', ok=ok, latency_ms=round(elapsed_ms, 3))
+        body['latency_ms'] = round(elapsed_ms, 3)
+        self._send(200 if ok else 400, body)
+
+    def _send(self, status, body):
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def address_string(self):
+        # Unix socket clients have no (host, port) address
+        return self.client_address[0] if isinstance(self.client_address, tuple) else 'unix'
+
+    def log_message(self, format, *args):
+        pass
+
+
+class SuggestionHTTPServer(SuggestionServerMixin, ThreadingHTTPServer):
+    pass
+
+
+class SuggestionUnixServer(SuggestionServerMixin, socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def run_server(host='127.0.0.1', port=8765, socket_path='', engine='forest',
+               cache_size=DEFAULT_MAX_ENTRIES, cache_file='', rank='', max_models=DEFAULT_MAX_MODELS, profile_log='',
+               game_length=''):
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        httpd = SuggestionUnixServer(socket_path, SuggestionHandler)
+        where = socket_path
+    else:
+        httpd = SuggestionHTTPServer((host, port), SuggestionHandler)
+        where = f'http://{host}:{port}'
+    cache = DraftCache(max_entries=cache_size, path=cache_file or None)
+    log = ProfileLog(profile_log) if profile_log else None
+    try:
+        httpd.setup_state(engine, cache, rank=rank, max_models=max_models, profile_log=log, game_length=game_length)
+    except ValueError as e:
+        httpd.server_close()
+        print(f'Error: {e}.')
+        exit(1)
+    tier = f' (rank {rank})' if rank else ''
+    print(f'Serving {engine}{tier} suggestions on {where} (Ctrl+C to stop)')
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        print('\nServer stopped.')
+    finally:
+        httpd.server_close()
+        cache.save()
+        if log:
+            log.close()
+        if socket_path and os.path.exists(socket_path):
+            os.remove(socket_path)
@@ -0,0 +1,224 @@
+"""
+Stateful draft session for the MLBB Draft Assistant.
+
+Keeps the model and the draft in memory while picks and bans arrive one at
+a time on stdin, either as commands or as a line-delimited JSON stream:
+
+    pick team miya          {"event": "pick", "side": "team", "hero": "miya"}
+    ban enemy chip          {"event": "ban", "side": "enemy", "hero": "chip"}
+    undo / reset            {"event": "undo"}
+    suggest [n] / bans [n]  {"event": "suggest", "n": 5}
+    show / quit
+
+Every pick or ban is answered with fresh suggestions, in the same format
+as the input line (text or JSON).
+
+With the matrix engine the session keeps score_all for both sides (our
+picks and the enemy's next pick) as two vectors. A pick adds one synergy
+row to its own side and one counter row and column to the other side; an
+undo subtracts them again. An event therefore costs O(heroes) instead of
+a rescore of the whole draft. The forest engine rescores with the loaded
+model on every request.
+"""
+import json
+import sys
+
+import numpy as np
+
+import matrix_scorer
+from main import (DRAFT_FIELDS, HERO_ID_TO_NAME, MAX_ENEMY, load_engine, parse_hero_arg, rank_bans, suggest_bans,
+                  suggest_heroes, top_k, validate_draft)
+
+SIDES = ('team', 'enemy')
+ACTIONS = ('pick', 'ban')
+HELP = ('commands: pick|ban team|enemy <heroes>, undo, reset, suggest [n], bans [n], show, quit '
+        '(or JSON lines like {"event": "pick", "side": "team", "hero": "miya"})')
+
+
+class DraftSession:
+    """One draft in progress, scored incrementally with the matrix engine."""
+
+    def __init__(self, model_data, engine='matrix', n_suggest=5, rank=''):
+        self.model_data = model_data
+        self.engine = engine
+        self.rank = rank
+        self.n_suggest = n_suggest
+        self.reset()
+
+    def reset(self):
+        self.draft = {field: [] for field in DRAFT_FIELDS}
+        self.history = []
+        if self.engine == 'matrix':
+            self.available = np.zeros(matrix_scorer.N_HEROES, dtype=bool)
+            self.available[np.asarray(self.model_data['hero_ids'], dtype=np.intp) - 1] = True
+            # score[side] is score_all for that side's next pick; float64 so undo does not drift
+            base = matrix_scorer.BASE_WEIGHT * self.model_data['base'].astype(np.float64)
+            self.scores = {side: base.copy() for side in SIDES}
+
+    def _apply_pick(self, side, hero, sign):
+        other = 'enemy' if side == 'team' else 'team'
+        counter = self.model_data['counter']
+        self.scores[side] += sign * matrix_scorer.SYNERGY_WEIGHT * self.model_data['synergy'][hero - 1]
+        self.scores[other] += sign * (matrix_scorer.COUNTER_WEIGHT * counter[hero - 1]
+                                      - matrix_scorer.THREAT_WEIGHT * counter[:, hero - 1])
+
+    def add(self, side, action, hero):
+        """Adds one pick or ban. Raises ValueError if the draft would become invalid."""
+        if side not in SIDES or action not in ACTIONS:
+            raise ValueError(f'expected {"|".join(ACTIONS)} {"|".join(SIDES)}, got {action} {side}')
+        if any(hero in heroes for heroes in self.draft.values()):
+            raise ValueError(f'{HERO_ID_TO_NAME.get(hero, hero)} is already picked or banned')
+        field = f'{side}_{action}'
+        draft = {**self.draft, field: self.draft[field] + [hero]}
+        error = validate_draft(**draft, require_picks=False)
+        if error:
+            raise ValueError(error)
+        self.draft = draft
+        self.history.append((side, action, hero))
+        if self.engine == 'matrix':
+            self.available[hero - 1] = False
+            if action == 'pick':
+                self._apply_pick(side, hero, 1)
+
+    def undo(self):
+        """Removes the last pick or ban and returns it as (side, action, hero)."""
+        if not self.history:
+            raise ValueError('nothing to undo')
+        side, action, hero = self.history.pop()
+        field = f'{side}_{action}'
+        self.draft = {**self.draft, field: self.draft[field][:-1]}
+        if self.engine == 'matrix':
+            self.available[hero - 1] = hero in self.model_data['hero_ids']
+            if action == 'pick':
+                self._apply_pick(side, hero, -1)
+        return side, action, hero
+
+    def suggest(self, n=None):
+        """The best picks for our team."""
+        n = n or self.n_suggest
+        if self.engine == 'matrix':
+            candidates = np.flatnonzero(self.available) + 1
+            return top_k(candidates, self.scores['team'][candidates - 1], n)
+        if not self.draft['team_pick']:
+            raise ValueError('the forest engine needs at least one team pick')
+        return suggest_heroes(**self.draft, n_suggest=n, model_data=self.model_data, engine=self.engine)
+
+    def suggest_bans(self, n=None):
+        """The best bans as (hero, impact) pairs, see main.suggest_bans."""
+        n = n or self.n_suggest
+        if self.engine == 'matrix':
+            candidates = np.flatnonzero(self.available) + 1
+            return rank_bans(candidates, self.scores['enemy'][candidates - 1],
+                             MAX_ENEMY - len(self.draft['enemy_pick']), n)
+        # Before the enemy's first pick suggest_bans switches to the matrices of the same rank
+        return suggest_bans(**self.draft, n_suggest=n, model_data=self.model_data, engine=self.engine,
+                            rank=self.rank)
+
+
+def parse_event(line):
+    """
+    Turns an input line into an event dict ({'event', 'side', 'hero', 'n'})
+    and whether it was JSON. Raises ValueError for malformed lines.
+    """
+    if line.startswith('{'):
+        event = json.loads(line)
+        if not isinstance(event, dict):
+            raise ValueError('a JSON event must be an object')
+        return event, True
+    words = line.split(None, 2)
+    event = {'event': words[0].lower()}
+    if event['event'] in ACTIONS:
+        if len(words) < 3:
+            raise ValueError(f'usage: {event["event"]} team|enemy <heroes>')
+        event['side'], event['hero'] = words[1].lower(), words[2]
+    elif len(words) > 1:
+        event['n'] = words[1]
+    return event, False
+
+
+def handle_event(session, event):
+    """Applies one event to the session. Returns the response dict, or None to quit."""
+    name = event.get('event')
+    response = {}
+    if name in ACTIONS:
+        heroes = parse_hero_arg(event.get('hero'), exit_on_error=False)
+        if not heroes:
+            raise ValueError('no hero given')
+        for hero in heroes:
+            session.add(str(event.get('side', '')).lower(), name, hero)
+        response['suggestions'] = session.suggest()
+    elif name == 'undo':
+        side, action, hero = session.undo()
+        response['undone'] = {'side': side, 'action': action, 'hero': hero}
+        response['suggestions'] = session.suggest() if session.engine == 'matrix' or session.draft['team_pick'] else []
+    elif name == 'reset':
+        session.reset()
+    elif name == 'suggest':
+        response['suggestions'] = session.suggest(int(event.get('n') or 0))
+    elif name == 'bans':
+        response['bans'] = [{'hero': int(hero), 'impact': round(impact, 6)}
+                            for hero, impact in session.suggest_bans(int(event.get('n') or 0))]
+    elif name in ('quit', 'exit'):
+        return None
+    elif name == 'help':
+        response['help'] = HELP
+    elif name != 'show':
+        raise ValueError(f'unknown event {name!r}; {HELP}')
+    response['draft'] = session.draft
+    return response
+
+
+def format_response(response):
+    """Text rendering of a handle_event response."""
+    def names(heroes):
+        return ', '.join(HERO_ID_TO_NAME.get(hero, str(hero)) for hero in heroes) or '-'
+
+    if 'error' in response:
+        return f"Error: {response['error']}"
+    lines = []
+    if 'help' in response:
+        lines.append(response['help'])
+    if 'undone' in response:
+        undone = response['undone']
+        lines.append(f"Undid {undone['side']} {undone['action']} {names([undone['hero']])}")
+    draft = response['draft']
+    lines.append(f"Team pick: {names(draft['team_pick'])} | ban: {names(draft['team_ban'])}   "
+                 f"Enemy pick: {names(draft['enemy_pick'])} | ban: {names(draft['enemy_ban'])}")
+    if 'suggestions' in response:
+        lines.append(f"Suggestions: {names(response['suggestions'])}")
+    if 'bans' in response:
+        lines.append('Bans: ' + (', '.join(f"{names([ban['hero']])} ({ban['impact']:.4f})"
+                                           for ban in response['bans']) or '-'))
+    return '\n'.join(lines)
+
+
+def run_session(engine='matrix', rank='', game_length='', n_suggest=5, draft=None, lines=None, out=sys.stdout):
+    """
+    Runs a session over input lines (stdin by default) until EOF or quit,
+    starting from draft (a dict of DRAFT_FIELDS lists) if given.
+    """
+    model_data = load_engine(engine, rank)
+    if game_length:
+        model_data = matrix_scorer.profile_matrices(model_data, game_length)
+    session = DraftSession(model_data, engine=engine, n_suggest=n_suggest, rank=rank)
+    for field, heroes in (draft or {}).items():
+        side, action = field.split('_')
+        for hero in heroes:
+            session.add(side, action, hero)
+    interactive = lines is None and sys.stdin.isatty()
+    if interactive:
+        print(HELP, file=out)
+    for line in (sys.stdin if lines is None else lines):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        as_json = line.startswith('{')
+        try:
+            event, as_json = parse_event(line)
+            response = handle_event(session, event)
+        except (ValueError, TypeError, AttributeError) as e:
+            response = {'error': str(e)}
+        if response is None:
+            break
+        print(json.dumps(response) if as_json else format_response(response), file=out, flush=True)
+    return session
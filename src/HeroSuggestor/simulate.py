@@ -0,0 +1,162 @@
+"""
+Self-play draft simulator for the MLBB Draft Assistant.
+
+Plays complete drafts in the real pick/ban order (see draft_search) between
+two copies of the matrix scorer. Every pick takes the hero with the best
+score_all value for the picking side, and every ban removes the hero the
+other side wants most. Gumbel noise scaled by the noise temperature makes
+the choices vary, and noise 0 plays greedily. The finished lineups are
+labelled with their matrix_scorer.win_probability_batch and a sampled
+winner.
+
+Thousands of games are played at once as NumPy arrays: each side keeps a
+running score vector per game, updated with one matrix row per pick, so a
+step costs O(games x heroes). Chunks of games run in a process pool with
+seeds spawned from one base seed, and are streamed in order to a temporary
+file that is moved into place once every chunk is written. An interrupted
+run leaves the previous file untouched.
+
+File layout:
+    MAGIC | uint64 header length | JSON header | fixed-size records
+Each record (RECORD_DTYPE, 24 bytes) holds both sides' picks and bans in
+draft order, whether the first-pick side won and its win probability. The
+record count follows from the file size.
+"""
+import json
+import os
+import struct
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import matrix_scorer
+from draft_search import DRAFT_ORDERS
+from main import load_engine, rank_path
+
+SIM_PATH = os.path.join(os.path.dirname(__file__), 'simulated_drafts.sim')
+
+MAGIC = b'MLBBSIM1'
+RECORD_DTYPE = np.dtype([
+    ('first_pick', 'u1', 5), ('second_pick', 'u1', 5),
+    ('first_ban', 'u1', 5), ('second_ban', 'u1', 5),
+    ('first_won', 'u1'), ('reserved', 'u1'), ('p_first', '<f2'),
+])
+DEFAULT_NOISE = 0.02
+CHUNK_GAMES = 4096
+CHUNKS_PER_WORKER = 2
+
+_worker_matrices = None
+
+
+def init_worker(rank='', game_length=''):
+    global _worker_matrices
+    _worker_matrices = load_engine('matrix', rank)
+    if game_length:
+        _worker_matrices = matrix_scorer.profile_matrices(_worker_matrices, game_length)
+
+
+def choose(scores, available, noise, rng):
+    """Best available hero (0-based) per game, after adding Gumbel noise."""
+    scores = np.where(available, scores, -np.inf)
+    if noise > 0:
+        scores = scores + noise * rng.gumbel(size=scores.shape).astype(np.float32)
+    return np.argmax(scores, axis=1)
+
+
+def simulate_chunk(n_games, seed, mode='ranked', noise=DEFAULT_NOISE, matrices=None):
+    """Plays n_games drafts and returns them as a RECORD_DTYPE array."""
+    matrices = _worker_matrices if matrices is None else matrices
+    rng = np.random.default_rng(seed)
+    synergy = matrices['synergy']
+    counter = matrices['counter']
+    games = np.arange(n_games)
+    available = np.zeros((n_games, matrix_scorer.N_HEROES), dtype=bool)
+    available[:, np.asarray(matrices['hero_ids'], dtype=np.intp) - 1] = True
+    # score[side] is score_all for that side's next pick, kept up to date per pick
+    base = matrix_scorer.BASE_WEIGHT * matrices['base']
+    score = {side: np.tile(base, (n_games, 1)) for side in ('first', 'second')}
+    records = np.zeros(n_games, dtype=RECORD_DTYPE)
+    counts = dict.fromkeys([(side, action) for side in ('first', 'second') for action in ('pick', 'ban')], 0)
+    for side, action in DRAFT_ORDERS[mode]:
+        other = 'second' if side == 'first' else 'first'
+        # Picks maximize the side's own score; bans take away the other side's best pick
+        hero = choose(score[side if action == 'pick' else other], available, noise, rng)
+        available[games, hero] = False
+        records[f'{side}_{action}'][:, counts[side, action]] = hero + 1
+        counts[side, action] += 1
+        if action == 'pick':
+            score[side] += matrix_scorer.SYNERGY_WEIGHT * synergy[hero]
+            score[other] += (matrix_scorer.COUNTER_WEIGHT * counter[hero]
+                             - matrix_scorer.THREAT_WEIGHT * counter[:, hero].T)
+    p_first = matrix_scorer.win_probability_batch(matrices, records['first_pick'], records['second_pick'])
+    records['p_first'] = p_first
+    records['first_won'] = rng.random(n_games) < p_first
+    return records
+
+
+def write_header(f, meta):
+    header = json.dumps({'dtype': RECORD_DTYPE.descr, 'meta': meta}).encode('utf-8')
+    f.write(MAGIC + struct.pack('<Q', len(header)) + header)
+
+
+def read_simulation(path):
+    """Memory-maps a simulation file. Returns (records, meta)."""
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f'{path} is not a simulation file')
+        (header_len,) = struct.unpack('<Q', f.read(8))
+        header = json.loads(f.read(header_len))
+    data_start = len(MAGIC) + 8 + header_len
+    count = (os.path.getsize(path) - data_start) // RECORD_DTYPE.itemsize
+    if count == 0:
+        return np.zeros(0, dtype=RECORD_DTYPE), header['meta']
+    records = np.memmap(path, dtype=RECORD_DTYPE, mode='r', offset=data_start, shape=(count,))
+    return records, header['meta']
+
+
+def run_simulation(n_games, output_path=SIM_PATH, mode='ranked', noise=DEFAULT_NOISE, workers=1, seed=42,
+                   rank='', game_length='', chunk_games=CHUNK_GAMES):
+    """
+    Simulates n_games drafts with the rank tier's matrices and streams them
+    to output_path (written atomically once complete). Returns the number
+    of drafts written.
+    """
+    start = time.perf_counter()
+    sizes = [min(chunk_games, n_games - offset) for offset in range(0, n_games, chunk_games)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    meta = {'games': n_games, 'mode': mode, 'noise': noise, 'seed': seed, 'rank': rank,
+            'game_length': game_length, 'matrices': os.path.basename(rank_path(matrix_scorer.MATRIX_PATH, rank)),
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S')}
+    tmp_path = f'{output_path}.tmp'
+    written = 0
+    with open(tmp_path, 'wb') as f:
+        write_header(f, meta)
+
+        def write(records):
+            nonlocal written
+            f.write(records.tobytes())
+            written += len(records)
+
+        if workers <= 1:
+            init_worker(rank, game_length)
+            for size, chunk_seed in zip(sizes, seeds):
+                write(simulate_chunk(size, chunk_seed, mode, noise))
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                     initargs=(rank, game_length)) as pool:
+                pending = deque()
+                for size, chunk_seed in zip(sizes, seeds):
+                    pending.append(pool.submit(simulate_chunk, size, chunk_seed, mode, noise))
+                    if len(pending) >= workers * CHUNKS_PER_WORKER:
+                        write(pending.popleft().result())
+                while pending:
+                    write(pending.popleft().result())
+    os.replace(tmp_path, output_path)
+    elapsed = time.perf_counter() - start
+    rate = written / elapsed if elapsed > 0 else 0.0
+    print(f'Simulated {written} drafts in {elapsed:.2f}s ({rate:.0f} drafts/s, {workers} worker(s)) -> {output_path}',
+          file=sys.stderr)
+    return written
@@ -0,0 +1,295 @@
+"""
+Training for the MLBB Hero Suggestor.
+
+Holds the heavy training stack (pandas, scikit-learn, joblib) so that
+main.py can serve suggestions without importing it. main.py imports this
+module only for --train.
+
+Training is incremental. A manifest next to the models records a content
+hash per hero of the training rows and of the snapshots. A rerun
+skips training when nothing changed. Otherwise it rebuilds only the matrix
+rows of changed heroes, and replaces the oldest trees of the forest with
+trees fitted on the new data (a full refit once too many heroes changed).
+With --train_source sim the forest learns from self-play drafts written by
+simulate.py instead; a new simulation file always means a full refit.
+"""
+import hashlib
+import json
+import math
+import os
+import time
+import pandas as pd
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+import joblib
+import matrix_scorer
+from compact_model import COMPACT_MODEL_PATH, export_compact_model
+from main import MODEL_PATH, build_feature_index, encode_teams, rank_data_dir, rank_path
+from simulate import SIM_PATH, read_simulation
+
+CSV_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), '..', 'data', 'csv', 'hero_data.csv')
+
+# Input columns of the model: one per hero ID
+FEATURE_HEROES = np.arange(1, 129)
+
+FOREST_PARAMS = {'n_estimators': 100, 'random_state': 42}
+# Simulated drafts are plentiful and noisy: a leaf needs 0.2% of the samples,
+# so trees stay at most ~500 leaves however many drafts are used
+SIM_FOREST_PARAMS = {**FOREST_PARAMS, 'min_samples_leaf': 0.002}
+
+MANIFEST_PATH = os.path.join(os.path.dirname(__file__), 'training_manifest.json')
+MANIFEST_VERSION = 1
+# Refit the whole forest once more than this share of the heroes changed
+FULL_REFIT_FRACTION = 0.25
+# Share of trees replaced per share of changed heroes
+REFRESH_FACTOR = 4
+
+def csv_path(rank=''):
+    """hero_data.csv of a rank tier: data/rank_<tier>/csv/hero_data.csv."""
+    return os.path.join(rank_data_dir(rank), 'csv', 'hero_data.csv') if rank else CSV_PATH
+
+def load_data(rank=''):
+    if not os.path.exists(csv_path(rank)):
+        print(f'{os.path.normpath(csv_path(rank))} not found. Convert the snapshots with json_to_csv_converter.py '
+              f'--data-dir {os.path.normpath(rank_data_dir(rank))} or use --train_source json.')
+        exit(1)
+    df = pd.read_csv(csv_path(rank))
+    return df
+
+def prepare_training_data(df):
+    """
+    Builds team -> pick samples from the CSV columns without a per-row loop.
+    Each row gives its best1..best5 (synergy) and counter1..counter5 heroes
+    as labels for a team of just main_heroid, in that order. Returns an
+    (n, 1) array of teams and the label array.
+    """
+    label_cols = [f'best{i+1}' for i in range(5)] + [f'counter{i+1}' for i in range(5)]
+    labels = df[label_cols].to_numpy(dtype=np.float64)
+    mains = np.repeat(df['main_heroid'].to_numpy(dtype=np.int64), len(label_cols))
+    labels = labels.ravel()
+    keep = ~np.isnan(labels)
+    return mains[keep].reshape(-1, 1), labels[keep].astype(np.int64)
+
+def prepare_training_data_from_json(data_dir=matrix_scorer.DATA_DIR):
+    """
+    Builds the same kind of samples as prepare_training_data, but from every
+    sub_hero/sub_hero_last entry in the JSON snapshots instead of the CSV's
+    top five. Compatibility entries play the role of best*, counter entries
+    of counter*. Each sample is weighted by the entry's increase_win_rate,
+    normalized to a mean of 1. Entries that lower the win rate (most
+    sub_hero_last entries) get zero weight and are dropped.
+    Returns (teams, labels, weights).
+    """
+    mains, subs, rates = [], [], []
+    for kind in ('hero_compatibility', 'hero_counter'):
+        for data in matrix_scorer.iter_snapshot_records(data_dir, kind):
+            entries = data.get('sub_hero', []) + data.get('sub_hero_last', [])
+            for entry in entries:
+                if entry.get('heroid') is None or entry.get('increase_win_rate') is None:
+                    continue
+                mains.append(data['main_heroid'])
+                subs.append(entry['heroid'])
+                rates.append(entry['increase_win_rate'])
+    mains = np.array(mains, dtype=np.int64)
+    subs = np.array(subs, dtype=np.int64)
+    weights = np.clip(np.array(rates, dtype=np.float64), 0, None)
+    keep = weights > 0
+    weights = weights[keep] / weights[keep].mean() if keep.any() else weights[keep]
+    return mains[keep].reshape(-1, 1), subs[keep], weights
+
+def sim_path(rank=''):
+    """Simulation file written by --simulate for a rank tier."""
+    return rank_path(SIM_PATH, rank)
+
+def prepare_training_data_from_sim(path=SIM_PATH, limit=0):
+    """
+    Builds samples from the winning side of each simulated draft (at most
+    limit drafts, 0 = all): its first 1..4 picks, zero-padded to 4 columns,
+    as the team and its next pick as the label. Samples are weighted by the
+    winner's win probability, normalized to a mean of 1, so lopsided wins
+    count more than coin flips. Returns (teams, labels, weights).
+    """
+    if not os.path.exists(path):
+        print(f'{os.path.normpath(path)} not found. Run main.py --simulate first.')
+        exit(1)
+    records, _ = read_simulation(path)
+    if limit:
+        records = records[:limit]
+    first_won = records['first_won'].astype(bool)
+    winners = np.where(first_won[:, None], records['first_pick'], records['second_pick']).astype(np.int64)
+    p_win = np.where(first_won, records['p_first'], 1 - records['p_first']).astype(np.float64)
+    # prefix[i - 1, j] keeps pick j in the team of sample i (the first i picks)
+    prefix = np.tri(4, 4, dtype=np.int64)
+    teams = (winners[:, None, :4] * prefix[None, :, :]).reshape(-1, 4)
+    labels = winners[:, 1:].reshape(-1)
+    weights = np.repeat(p_win, 4)
+    weights = weights / weights.mean() if len(weights) else weights
+    return teams, labels, weights
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def snapshot_hashes(data_dir):
+    """
+    SHA-256 of each hero's counter and compatibility snapshots, by hero ID.
+    With a snapshot store the hashes come from its index, so nothing is
+    decompressed.
+    """
+    store = matrix_scorer.open_snapshot_store(data_dir)
+    stored = {}
+    if store is not None:
+        with store:
+            stored = store.hashes()
+    hashes = {}
+    for hero_id in range(1, matrix_scorer.N_HEROES + 1):
+        digest = hashlib.sha256()
+        found = False
+        for kind in ('hero_counter', 'hero_compatibility'):
+            try:
+                if store is not None:
+                    digest.update(stored[f'{kind}/{hero_id}'].encode('ascii'))
+                else:
+                    with open(os.path.join(data_dir, kind, f'{hero_id}.json'), 'rb') as f:
+                        digest.update(f.read())
+                found = True
+            except (OSError, KeyError):
+                pass
+            digest.update(b'\0')
+        if found:
+            hashes[str(hero_id)] = digest.hexdigest()
+    return hashes
+
+def csv_row_hashes(df):
+    """Hash of each hero's row in hero_data.csv, by main_heroid."""
+    row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    return {str(int(hero)): f'{h:016x}' for hero, h in zip(df['main_heroid'], row_hashes)}
+
+def changed_heroes(old, new):
+    """Keys (hero IDs as strings) whose hash was added, removed or changed."""
+    return sorted(hero for hero in set(old) | set(new) if old.get(hero) != new.get(hero))
+
+def load_manifest(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get('version') == MANIFEST_VERSION else None
+
+def save_manifest(path, manifest):
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+def forest_params(source):
+    return SIM_FOREST_PARAMS if source == 'sim' else FOREST_PARAMS
+
+def fit_forest(X, y, sample_weight, previous=None, changed_fraction=1.0, generation=0, params=FOREST_PARAMS):
+    """
+    Fits the forest. Given the previous forest and the share of heroes whose
+    training rows changed, replaces only the oldest trees with new ones
+    fitted on the current data (warm start). Returns (clf, trees fitted).
+    """
+    n_trees = params['n_estimators']
+    n_replace = math.ceil(n_trees * min(1.0, changed_fraction * REFRESH_FACTOR))
+    reusable = (previous is not None and changed_fraction <= FULL_REFIT_FRACTION and n_replace < n_trees
+                and len(previous.estimators_) == n_trees
+                and np.array_equal(np.unique(y), previous.classes_))
+    if not reusable:
+        clf = RandomForestClassifier(**params)
+        clf.fit(X, y, sample_weight=sample_weight)
+        return clf, n_trees
+    clf = previous
+    clf.estimators_ = clf.estimators_[n_replace:]
+    # A fresh seed per generation, so new trees do not repeat the bootstraps of kept ones
+    clf.set_params(warm_start=True, random_state=params['random_state'] + generation)
+    clf.fit(X, y, sample_weight=sample_weight)
+    clf.set_params(warm_start=False)
+    return clf, n_replace
+
+def train_and_save_model(source='csv', rank='', full=False, sim_limit=0):
+    """
+    Trains the model of one rank tier ('' = the default data) and writes the
+    pickle, the compact forest and the matrices under that tier's paths.
+    Only the parts whose input hashes changed since the last run are
+    rebuilt; full=True ignores the manifest and rebuilds everything.
+    sim_limit caps the simulated drafts used with source='sim'.
+    """
+    data_dir = rank_data_dir(rank)
+    model_path = rank_path(MODEL_PATH, rank)
+    compact_path = rank_path(COMPACT_MODEL_PATH, rank)
+    matrix_path = rank_path(matrix_scorer.MATRIX_PATH, rank)
+    manifest_path = rank_path(MANIFEST_PATH, rank)
+    tier = f' (rank {rank})' if rank else ''
+    start = time.perf_counter()
+
+    snapshots = snapshot_hashes(data_dir)
+    df = load_data(rank) if source == 'csv' else None
+    if source == 'sim':
+        digest = file_hash(sim_path(rank)) if os.path.exists(sim_path(rank)) else ''
+        inputs = {'sim': f'{digest}:{sim_limit}'}
+    else:
+        inputs = snapshots if source == 'json' else csv_row_hashes(df)
+    previous = None if full else load_manifest(manifest_path)
+    if previous and (previous.get('source') != source or previous.get('params') != forest_params(source)
+                     or not all(os.path.exists(path) for path in (model_path, compact_path, matrix_path))):
+        previous = None
+    changed_inputs = changed_heroes(previous['inputs'], inputs) if previous else None
+    changed_snapshots = changed_heroes(previous['snapshots'], snapshots) if previous else None
+    if previous and not changed_inputs and not changed_snapshots:
+        print(f'Model{tier} is up to date with its {source} data, skipping training.')
+        return
+
+    generation = previous['generation'] + 1 if previous else 0
+    report = []
+    if previous is None or changed_inputs:
+        sample_weight = None
+        if source == 'json':
+            X, y, sample_weight = prepare_training_data_from_json(data_dir)
+        elif source == 'sim':
+            X, y, sample_weight = prepare_training_data_from_sim(sim_path(rank), sim_limit)
+        else:
+            X, y = prepare_training_data(df)
+        X_bin = encode_teams(X, build_feature_index(FEATURE_HEROES), len(FEATURE_HEROES))
+        previous_clf = joblib.load(model_path)['model'] if previous else None
+        changed_fraction = len(changed_inputs) / max(len(inputs), 1) if previous else 1.0
+        clf, fitted = fit_forest(X_bin, y, sample_weight, previous_clf, changed_fraction, generation,
+                                 forest_params(source))
+        joblib.dump({'model': clf, 'feature_heroes': FEATURE_HEROES}, model_path)
+        export_compact_model(clf, FEATURE_HEROES, compact_path)
+        report.append(f'{fitted}/{forest_params(source)["n_estimators"]} trees fitted on {len(y)} samples')
+    if previous is None:
+        matrices = matrix_scorer.build_matrices(data_dir)
+        report.append('matrices rebuilt')
+    elif changed_snapshots:
+        matrices = matrix_scorer.update_matrices(matrix_scorer.load_matrices(matrix_path, data_dir),
+                                                 data_dir, [int(hero) for hero in changed_snapshots])
+        report.append(f'{len(changed_snapshots)} matrix row(s) rebuilt')
+    else:
+        matrices = None
+    if matrices is not None:
+        matrix_scorer.save_matrices(matrices, matrix_path)
+
+    save_manifest(manifest_path, {
+        'version': MANIFEST_VERSION,
+        'rank': rank,
+        'source': source,
+        'params': forest_params(source),
+        'generation': generation,
+        'trained_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'inputs': inputs,
+        'snapshots': snapshots,
+    })
+    if not previous:
+        changes = 'full build'
+    elif source == 'sim':
+        changes = 'new simulation' if changed_inputs else f'{len(changed_snapshots)} changed hero(es)'
+    else:
+        changes = f'{len(set(changed_inputs) | set(changed_snapshots))} changed hero(es)'
+    print(f'Model{tier} trained from {source} ({changes}): {", ".join(report)}; '
+          f'saved in {time.perf_counter() - start:.1f}s.')
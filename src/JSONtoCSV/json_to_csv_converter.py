@@ -1,10 +1,13 @@
 '''
 This script processes hero counter and compatibility data from JSON files
-and exports it to a CSV file.
+and exports it to a CSV file. A data directory holding the fetcher's
+snapshot store is read through the store reader instead.
 '''
+import argparse
 import json
 import csv
 import os
+import sys
 
 def extract_hero_ids_from_list(hero_data_list, num_heroes=5):
     """
@@ -39,6 +42,15 @@ def process_single_hero_files(counter_json_path, compatibility_json_path):
     except json.JSONDecodeError:
         # Error message will be printed in the main loop
         return None
+    return process_single_hero_data(counter_data_full, compatibility_data_full)
+
+def process_single_hero_data(counter_data_full, compatibility_data_full):
+    """
+    Processes the counter and compatibility API responses of a single hero.
+    Returns a list representing a data row for the CSV, or None on error.
+    """
+    if counter_data_full is None or compatibility_data_full is None:
+        return None
 
     try:
         if not (counter_data_full.get('data') and counter_data_full['data'].get('records') and
@@ -86,8 +98,27 @@ if __name__ == "__main__":
         project_root = os.getcwd()
         print(f"Warning: __file__ not defined. Assuming project root is current working directory: {project_root}")
 
-    # Define output CSV file path as requested: in "data/csv" folder
-    csv_output_dir = os.path.join(project_root, 'data', 'csv')
+    # Snapshots are read from data/ by default; per-rank snapshots live in data/rank_<tier>/
+    parser = argparse.ArgumentParser(description='Convert hero JSON snapshots to hero_data.csv')
+    parser.add_argument('--data-dir', default=os.path.join(project_root, 'data'),
+                        help='Directory with hero_counter/ and hero_compatibility/; the CSV is written to its csv/ folder')
+    data_dir = os.path.abspath(parser.parse_args().data_dir)
+
+    # The store reader lives with the fetcher in src/DataFetching
+    sys.path.insert(0, os.path.join(project_root, 'src', 'DataFetching'))
+    from snapshot_store import STORE_FILE, open_store
+
+    # The snapshot store takes precedence over the JSON files when the data directory has one
+    try:
+        store = open_store(data_dir)
+    except (OSError, ValueError) as e:
+        print(f"Error reading the snapshot store: {e}")
+        exit(1)
+    if store is not None:
+        print(f"Reading snapshots from {os.path.join(data_dir, STORE_FILE)}")
+
+    # Define output CSV file path as requested: in "csv" folder of the data directory
+    csv_output_dir = os.path.join(data_dir, 'csv')
     output_csv_file_path = os.path.join(csv_output_dir, "hero_data.csv")
 
     if not os.path.exists(csv_output_dir):
@@ -112,19 +143,28 @@ if __name__ == "__main__":
     print(f"Starting processing for up to {num_heroes_to_process} heroes...")
 
     for hero_id in range(1, num_heroes_to_process + 1):
-        counter_json_file = os.path.join(project_root, 'data', 'hero_counter', f'{hero_id}.json')
-        compatibility_json_file = os.path.join(project_root, 'data', 'hero_compatibility', f'{hero_id}.json')
-        
-        hero_data_row = process_single_hero_files(counter_json_file, compatibility_json_file)
+        if store is not None:
+            hero_data_row = process_single_hero_data(store.get('hero_counter', hero_id),
+                                                     store.get('hero_compatibility', hero_id))
+            if not hero_data_row:
+                print(f"Skipping hero ID: {hero_id}. Missing snapshot or problem with data structure in {STORE_FILE}")
+        else:
+            counter_json_file = os.path.join(data_dir, 'hero_counter', f'{hero_id}.json')
+            compatibility_json_file = os.path.join(data_dir, 'hero_compatibility', f'{hero_id}.json')
+
+            hero_data_row = process_single_hero_files(counter_json_file, compatibility_json_file)
+            if not hero_data_row:
+                print(f"Skipping hero ID: {hero_id}. Problem with files or data structure. Paths checked:")
+                print(f"  Counter: {counter_json_file}")
+                print(f"  Compatibility: {compatibility_json_file}")
         
         if hero_data_row:
             all_hero_data_rows.append(hero_data_row)
             processed_count += 1
         else:
             skipped_count += 1
-            print(f"Skipping hero ID: {hero_id}. Problem with files or data structure. Paths checked:")
-            print(f"  Counter: {counter_json_file}")
-            print(f"  Compatibility: {compatibility_json_file}")
+    if store is not None:
+        store.close()
 
     if not all_hero_data_rows:
         print("No data was successfully processed. CSV file will not be created or will be empty.")